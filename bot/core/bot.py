@@ -5,6 +5,8 @@ from typing import Optional
 import aiohttp
 import pyrogram
 
+from bot import util
+
 from .command_dispatcher import CommandDispatcher
 from .conversation_dispatcher import ConversationDispatcher
 from .database_provider import DatabaseProvider
@@ -64,6 +66,7 @@ class Bot(TelegramBot,
                 await self.client.stop()
         await self.http.close()
         await self.db.close()
+        util.async_helper.shutdown()
 
         self.log.info("Running post-stop hooks")
         if self.loaded:
@@ -49,6 +49,7 @@ class TelegramBot(BotMixinBase):
 
     def __init__(self: "Bot", **kwargs: Any) -> None:
         self.config = util.config.TelegramConfig()
+        util.async_helper.configure(self.config["executor_sizes"] or {})
         self._plugin_event_handlers = {}
         self._disconnect = False
         self.loaded = False
@@ -1,18 +1,17 @@
 import ast
 import asyncio
+import base64
 import logging
 from datetime import datetime, timedelta
 from os.path import join
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, ClassVar, Dict, Optional, Set, Tuple, Union
+from typing import (TYPE_CHECKING, Any, ClassVar, Dict, MutableMapping, Optional, Set,
+                    Tuple, Union)
 from urllib import parse
 
 from aioaria2 import Aria2WebsocketClient, AsyncAria2Server
 from aioaria2.exceptions import Aria2rpcException
-from aiofile import AIOFile, Reader, Writer
 from aiopath import AsyncPath
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
 from pyrogram import errors
 from tenacity import (
     before_log,
@@ -25,41 +24,128 @@ from tenacity import (
 from bot import command, plugin, util
 
 if TYPE_CHECKING:
-    from .gdrive import GoogleDrive
+    from .gdrive import GoogleDrive, ResumableUpload
     from .mega import Mega
     from ..core import Bot
 
 
-class SeedProtocol(asyncio.SubprocessProtocol):
+class SeedManager:
+    """Seeds every finished torrent from one dedicated aria2 daemon.
 
-    def __init__(self, future: asyncio.Future, log: logging.Logger):
-        self.future = future
-        self.log = log
+    Torrents are added over RPC, aria2 stops each of them once it reaches the
+    ratio or time limit and the least valuable seed is evicted when all slots
+    are taken, so the process and socket count stays the same."""
 
-        self.output = bytearray()
+    log: ClassVar[logging.Logger] = logging.getLogger("aria2seed")
 
-    def pipe_data_received(self, fd: int, data: bytes):
-        self.output.extend(data)
+    ratio: ClassVar[float] = 1.0
+    time: ClassVar[int] = 24 * 60  # minutes
+    slots: ClassVar[int] = 10
 
-    def process_exited(self):
-        self.future.set_result(True)
+    bot: "Bot"
+    client: Optional[Aria2WebsocketClient]
+    lock: asyncio.Lock
+
+    def __init__(self, bot: "Bot") -> None:
+        self.bot = bot
+
+        self.client = None
+        self.lock = asyncio.Lock()
+
+    @retry(wait=wait_random_exponential(multiplier=2, min=1, max=6),
+           stop=stop_after_attempt(5),
+           retry=retry_if_exception_type(Aria2rpcException))
+    async def _connect(self, url: str) -> Aria2WebsocketClient:
+        return await Aria2WebsocketClient.new(url=url)
+
+    async def start(self) -> None:
+        port = util.aria2.get_free_port()
+        cmd = [
+            "aria2c", "--enable-rpc", "--rpc-listen-all=false",
+            f"--rpc-listen-port={port}", "--bt-seed-unverified=true",
+            "--check-integrity=false", f"--seed-ratio={self.ratio}",
+            f"--seed-time={self.time}", f"--max-concurrent-downloads={self.slots}",
+            "--max-download-result=0", "--daemon=true"
+        ]
+        server = AsyncAria2Server(*cmd, daemon=True)
+        await server.start()
+        await server.wait()
+
+        self.client = await self._connect(f"http://127.0.0.1:{port}/jsonrpc")
+        self.log.info(f"Seeding daemon started on port {port}")
+
+    async def stop(self) -> None:
+        if self.client is not None:
+            try:
+                await self.client.shutdown()
+            except Aria2rpcException as e:
+                self.log.warning(f"Seeding daemon didn't shutdown cleanly: {e}")
+            finally:
+                await self.client.close()
+                self.client = None
+
+    @staticmethod
+    def value(seed: Dict[str, Any]) -> Tuple[int, float]:
+        """Ranks a seed, lowest is evicted first: idle seeds that already gave
+        back the most go before ones still uploading."""
+
+        try:
+            ratio = int(seed["uploadLength"]) / int(seed["completedLength"])
+        except ZeroDivisionError:
+            ratio = 0.0
+
+        return int(seed["uploadSpeed"]), -ratio
+
+    async def evict(self) -> None:
+        keys = ["gid", "uploadSpeed", "uploadLength", "completedLength"]
+        seeds = await self.client.tellActive(keys)  # type: ignore
+        seeds += await self.client.tellWaiting(0, self.slots, keys)  # type: ignore
+        while len(seeds) >= self.slots:
+            seed = min(seeds, key=self.value)
+            seeds.remove(seed)
+            await self.client.forceRemove(seed["gid"])  # type: ignore
+            self.log.info(f"Evicted seed: [gid: '{seed['gid']}']")
+
+    async def add(self, torrent: AsyncPath, directory: AsyncPath) -> str:
+        async with self.lock:
+            if self.client is None:
+                await self.start()
+
+            await self.evict()
+            data = base64.b64encode(await torrent.read_bytes())
+            return await self.client.addTorrent(  # type: ignore
+                str(data, "utf-8"), options={"dir": str(directory)})
 
 
 class Aria2WebSocketServer:
     log: ClassVar[logging.Logger] = logging.getLogger("aria2ws")
+    # Telegram edits are throttled to this many seconds, sampling follows it
+    edit_interval: ClassVar[float] = 5.0
+
+    trackers_cache: ClassVar[AsyncPath] = AsyncPath(Path.home() / ".cache" / "bot" /
+                                                    "trackers.txt")
+    trackers_ttl: ClassVar[int] = 12 * 60 * 60
+    trackers_url: ClassVar[str] = ("https://raw.githubusercontent.com/ngosang/"
+                                   "trackerslist/master/trackers_best.txt")
 
     bot: "Bot"
     cancelled: Set[str]
+    client: Aria2WebsocketClient
+    seeder: SeedManager
     downloads: Dict[str, util.aria2.Download]
     lock: asyncio.Lock
+    pipelines: Dict[str, Dict[str, Any]]
     uploads: Dict[str, Any]
 
     index_link: Optional[str]
     context: command.Context
     stopping: bool
     mega: Set[str]
+    wakeup: asyncio.Event
+    trackers_task: Optional[asyncio.Task]
 
     _protocol: str
+    _trackers_age: float
 
     def __init__(self, bot: "Bot", drive: "GoogleDrive") -> None:
         self.bot = bot
@@ -69,12 +155,61 @@ class Aria2WebSocketServer:
 
         self.cancelled = set()
         self.downloads = {}
+        self.pipelines = {}
         self.uploads = {}
 
         self.index_link = self.drive.index_link
         self.context = None  # type: ignore
         self.stopping = False
         self.mega = set()
+        self.wakeup = asyncio.Event()
+        self.trackers_task = None
+        self.seeder = SeedManager(bot)
+
+    @staticmethod
+    def formatTrackers(text: str) -> str:
+        return ",".join(line.strip() for line in text.splitlines() if line.strip())
+
+    async def cachedTrackers(self) -> Tuple[str, float]:
+        """Returns the cached tracker list and its age in seconds."""
+
+        try:
+            stat = await self.trackers_cache.stat()
+            text = await self.trackers_cache.read_text()
+        except FileNotFoundError:
+            return "", float("inf")
+
+        return self.formatTrackers(text), util.time.sec() - stat.st_mtime
+
+    async def refreshTrackers(self, age: float) -> None:
+        """Keeps the running daemon's bt-tracker option fresh in the background."""
+
+        while not self.stopping:
+            delay = self.trackers_ttl - age
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                async with self.bot.http.get(self.trackers_url) as resp:
+                    resp.raise_for_status()
+                    text = await resp.text()
+
+                trackers = self.formatTrackers(text)
+                if not trackers:
+                    raise ValueError("Empty tracker list")
+
+                await self.trackers_cache.parent.mkdir(parents=True, exist_ok=True)
+                await self.trackers_cache.write_text(text)
+                await self.client.changeGlobalOption({"bt-tracker": trackers})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.warning(f"Failed to refresh tracker list: {e}")
+                # Try again sooner than a full TTL
+                age = self.trackers_ttl - 10 * 60
+            else:
+                self.log.info("Tracker list refreshed")
+                age = 0
 
     @classmethod
     async def init(cls, bot: "Bot", drive: "GoogleDrive") -> "Aria2WebSocketServer":
@@ -83,10 +218,8 @@ class Aria2WebSocketServer:
         download_path = self.bot.config["download_path"]
         await download_path.mkdir(parents=True, exist_ok=True)
 
-        link = "https://raw.githubusercontent.com/ngosang/trackerslist/master/trackers_best.txt"
-        async with self.bot.http.get(link) as resp:
-            trackers_list: str = await resp.text()
-            trackers: str = "[" + trackers_list.replace("\n\n", ",") + "]"
+        # Boot with whatever is cached, start() refreshes it in the background
+        trackers, self._trackers_age = await self.cachedTrackers()
 
         cmd = [
             "aria2c", f"--dir={str(download_path)}", "--enable-rpc",
@@ -94,9 +227,10 @@ class Aria2WebSocketServer:
             "--rpc-max-request-size=1024M", "--seed-time=0.01",
             "--seed-ratio=0.1", "--max-concurrent-downloads=5",
             "--min-split-size=10M", "--follow-torrent=mem", "--split=10",
-            "--bt-save-metadata=true", f"--bt-tracker={trackers}",
-            "--daemon=true", "--allow-overwrite=true"
+            "--bt-save-metadata=true", "--daemon=true", "--allow-overwrite=true"
         ]
+        if trackers:
+            cmd.append(f"--bt-tracker={trackers}")
         key_path = AsyncPath(Path.home() / ".cache" / "bot" / ".certs")
         if await (key_path / "cert.pem"
                   ).is_file() and await (key_path / "key.pem").is_file():
@@ -120,11 +254,15 @@ class Aria2WebSocketServer:
 
         trigger = [(self.onDownloadStart, "onDownloadStart"),
                    (self.onDownloadComplete, "onDownloadComplete"),
+                   (self.onBtDownloadComplete, "onBtDownloadComplete"),
                    (self.onDownloadError, "onDownloadError")]
         for handler, name in trigger:
             client.register(handler, f"aria2.{name}")
 
+        self.client = client
         self.bot.loop.create_task(self.updateProgress())
+        self.trackers_task = self.bot.loop.create_task(
+            self.refreshTrackers(self._trackers_age))
         return client
 
     @property
@@ -147,6 +285,7 @@ class Aria2WebSocketServer:
         async with self.lock:
             self.downloads[gid] = await self.getDownload(client, gid)
         self.log.info(f"Starting download: [gid: '{gid}']")
+        self.wakeup.set()
 
     async def onDownloadComplete(self, client: Aria2WebsocketClient,
                                  data: Union[Dict[str, Any], Any]) -> None:
@@ -162,53 +301,93 @@ class Aria2WebSocketServer:
 
         if await file.is_file():
             if gid in self.mega:
-                async with self.lock:
-                    del self.downloads[gid]
-
                 M: "Mega" = self.bot.plugins["Mega"]  # type: ignore
-                outputFile: AsyncPath = M.file[gid]["file"]
-                aes = M.file[gid]["aes"]
-                CHUNK_SIZE = 50 * 1024 * 1024
 
+                # Keep the download tracked so checkProgress reports decryption
                 self.log.info(f"Decrypting download: [gid: '{gid}']")
-                async with AIOFile(outputFile, "w+b") as f:
-                    writer = Writer(f)
-                    async with AIOFile(file.path, "rb") as temp:
-                        reader = Reader(temp, chunk_size=CHUNK_SIZE)
-                        async for chunk in reader:
-                            chunk = await util.run_sync(aes.decrypt, chunk)
-                            await writer(chunk)
-                            await f.fsync()
-                await file.path.unlink()
-                outputFile = await outputFile.rename(outputFile.parent / outputFile.stem)
+                failure: Optional[str] = None
+                try:
+                    outputFile = await M.decrypt(gid, file.path)
+                    await file.path.unlink()
+                    outputFile = await outputFile.rename(outputFile.parent /
+                                                         outputFile.stem)
+
+                    info = M.file[gid]
+                    if not await M.verify(outputFile, info["key"], info["mac_iv"],
+                                          info["meta_mac"]):
+                        await outputFile.unlink()
+                        failure = "MAC mismatch, file is corrupted"
+                        self.log.warning(f"MAC mismatch: [gid: '{gid}']")
+                except Exception as e:  # skipcq: PYL-W0703
+                    failure = str(e) or type(e).__name__
+                    self.log.error(f"Decrypting failed: [gid: '{gid}']", exc_info=e)
+
+                if failure is not None:
+                    async with self.lock:
+                        M.file.pop(gid, None)
+                        self.mega.discard(gid)
+                        self.downloads.pop(gid, None)
+                        await self.bot.respond(self.context.msg,
+                                               f"`{file.name}`\n"
+                                               "Status: **Error**\n"
+                                               f"Error: __{failure}__",
+                                               mode="reply")
+                        await self.checkDelete()
+                    return
+
                 async with self.lock:
+                    del M.file[gid]
                     self.mega.remove(gid)
                     self.downloads[gid] = await file.update()
-                    self.uploads[gid] = await self.drive.uploadFile(self.downloads[gid])
+                await self.startUpload(self.downloads[gid])
             else:
-                async with self.lock:
-                    self.uploads[gid] = await self.drive.uploadFile(file)
+                await self.startUpload(file)
         elif await file.is_dir():
-            folderId = await self.drive.createFolder(file.name)
-            folderTasks = self.drive.uploadFolder(file.dir / file.name,
-                                                  gid=gid,
-                                                  parent_id=folderId)
+            cancelled = False
+            error: Optional[Exception] = None
+            pipeline = self.pipelines.get(gid)
+            if pipeline is not None:
+                # Most files are already uploaded, only flush the remainder
+                self.queueCompleted(file, pipeline)
+                pipeline["queue"].put_nowait(None)
+                async with self.lock:
+                    self.uploads[gid] = pipeline
+                self.wakeup.set()
 
-            async with self.lock:
-                self.uploads[gid] = {"generator": folderTasks, "counter": 0}
+                try:
+                    await pipeline["task"]
+                except asyncio.CancelledError:
+                    cancelled = True
+                except Exception as e:  # skipcq: PYL-W0703
+                    error = e
+                finally:
+                    self.pipelines.pop(gid, None)
+
+                folderId = pipeline["root"]
+            else:
+                # Syncing into an earlier mirror uploads only what changed
+                existing = (await self.drive.findFolder(file.name)
+                            if self.drive.sync else None)
+                folderId = existing or await self.drive.createFolder(file.name)
+                upload: Dict[str, Any] = {"counter": 0}
+                async with self.lock:
+                    self.uploads[gid] = upload
+                self.wakeup.set()
 
-            cancelled = False
-            async for task in folderTasks:
                 try:
-                    await task
+                    await self.drive.uploadFolder(file.dir / file.name,
+                                                  gid=gid,
+                                                  parent_id=folderId,
+                                                  state=upload,
+                                                  sync=existing is not None)
                 except asyncio.CancelledError:
                     cancelled = True
-                    break
-                else:
-                    async with self.lock:
-                        self.uploads[gid]["counter"] += 1
+                except Exception as e:  # skipcq: PYL-W0703
+                    error = e
 
-            if not cancelled:
+            if error is not None:
+                await self.failUpload(file, error)
+            elif not cancelled:
                 async with self.lock:
                     del self.uploads[gid]
                     del self.downloads[gid]
@@ -243,6 +422,50 @@ class Aria2WebSocketServer:
             self.bot.loop.create_task(self.seedFile(file),
                                       name=f"Seed-{file.gid}")
 
+    async def startUpload(self, file: util.aria2.Download) -> None:
+        content = await self.drive.uploadFile(file, msg=self.context.msg)
+        if isinstance(content, str):
+            # Empty files are created in one call, there is nothing to track
+            response = await self.drive.getInfo(content, ["size", "webContentLink"])
+            await self.replyUpload(file.gid, file.name, response)
+            return
+
+        async with self.lock:
+            self.uploads[file.gid] = content
+        self.wakeup.set()
+
+    async def replyUpload(self, gid: str, name: str,
+                          response: MutableMapping[str, Any]) -> None:
+        human = util.file.human_readable_bytes
+        fileLink = (f"**GoogleDrive Link**: [{name}]({response.get('webContentLink')}) "
+                    f"(__{human(int(response.get('size', 0)))}__)")
+        if self.index_link is not None:
+            link = join(self.index_link, parse.quote(name))
+            fileLink += f"\n\n__IndexLink__: [Here]({link})."
+
+        async with self.lock:
+            await self.bot.respond(self.context.msg, fileLink, mode="reply")
+            self.uploads.pop(gid, None)
+            del self.downloads[gid]
+            await self.checkDelete()
+
+    async def onBtDownloadComplete(self, client: Aria2WebsocketClient,
+                                   data: Union[Dict[str, Any], Any]) -> None:
+        gid = data["params"][0]["gid"]
+
+        pipeline = self.pipelines.get(gid)
+        file = self.downloads.get(gid)
+        if pipeline is None or file is None:
+            return
+
+        # Every piece is in, queue what the last poll hasn't seen yet
+        try:
+            await file.update(["bitfield", "pieceLength"])
+        except Aria2rpcException:
+            return  # Removed meanwhile, onDownloadComplete queues the rest
+
+        self.queueCompleted(file, pipeline)
+
     async def onDownloadError(self, client: Aria2WebsocketClient,
                               data: Union[Dict[str, Any], Any]) -> None:
         gid = data["params"][0]["gid"]
@@ -258,7 +481,95 @@ class Aria2WebSocketServer:
         self.log.warning(f"[gid: '{gid}']: {file.error_message}")
         async with self.lock:
             del self.downloads[file.gid]
+            # The rest of the torrent never arrives, stop uploading it
+            pipeline = self.pipelines.pop(gid, None)
+            if pipeline is not None:
+                pipeline["task"].cancel()
+                self.uploads.pop(gid, None)
             await self.checkDelete()
+        self.wakeup.set()
+
+    @staticmethod
+    def pipelineable(file: util.aria2.Download) -> bool:
+        return (not file.metadata and file.bittorrent is not None and
+                file.bittorrent.mode == "multi" and bool(file.bittorrent.info) and
+                bool(file.files) and not file.files[0].metadata)
+
+    def startPipeline(self, file: util.aria2.Download) -> None:
+        """Uploads files of a multi-file torrent while the rest still downloads."""
+
+        pipeline: Dict[str, Any] = {
+            "counter": 0,
+            "queue": asyncio.Queue(),
+            "queued": set(),
+            "root": None
+        }
+        pipeline["task"] = self.bot.loop.create_task(
+            self.pipelineWorker(file, pipeline), name=file.gid)
+
+        # Completion is read from the piece bitfield, far smaller than the
+        # files array of a big pack
+        file.watch_pieces = True
+        self.pipelines[file.gid] = pipeline
+
+    @staticmethod
+    def queueCompleted(file: util.aria2.Download, pipeline: Dict[str, Any]) -> None:
+        queued = pipeline["queued"]
+        for content in file.files:
+            if (content.index in queued or not content.selected or
+                    not file.verified(content)):
+                continue
+
+            queued.add(content.index)
+            pipeline["queue"].put_nowait(content.path)
+
+    async def pipelineWorker(self, file: util.aria2.Download,
+                             pipeline: Dict[str, Any]) -> None:
+        root = Path(str(file.dir / file.name))
+
+        # Create the whole folder tree up front
+        pipeline["root"] = await self.drive.createFolder(file.name)
+        folders: Dict[Path, str] = {Path("."): pipeline["root"]}
+        parents = {Path(str(content)).relative_to(root).parent
+                   for content in file.files if content.selected}
+        levels: Dict[int, Set[Path]] = {}
+        for parent in parents:
+            for depth in range(1, len(parent.parts) + 1):
+                levels.setdefault(depth, set()).add(Path(*parent.parts[:depth]))
+        # Each level goes out as one batch once its parents exist
+        for depth in sorted(levels):
+            level = list(levels[depth])
+            folderIds = await asyncio.gather(*(
+                self.drive.createFolder(folder.name, folders[folder.parent])
+                for folder in level))
+            folders.update(zip(level, folderIds))
+
+        queue: asyncio.Queue = pipeline["queue"]
+
+        async def worker() -> None:
+            while True:
+                path = await queue.get()
+                if path is None:
+                    queue.put_nowait(None)  # Stops the other workers as well
+                    return
+
+                parent_id = folders[Path(str(path)).relative_to(root).parent]
+                upload = util.File(path)
+                content = await self.drive.uploadFile(upload, parent_id)
+                if not isinstance(content, str):  # Empty files are done already
+                    await upload.progress(update=False)
+
+                pipeline["counter"] += 1
+
+        workers = [
+            self.bot.loop.create_task(worker(), name=file.gid)
+            for _ in range(self.drive.upload_workers)
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
 
     @retry(wait=wait_random_exponential(multiplier=2, min=3, max=6),
            stop=stop_after_attempt(5),
@@ -268,47 +579,69 @@ class Aria2WebSocketServer:
         time = util.time.format_duration_td
         human = util.file.human_readable_bytes
 
-        for file in list(self.downloads.values()):
-            try:
-                file = await file.update()
-            except Aria2rpcException:
-                continue
+        try:
+            downloads = await util.aria2.update_all(self.client,
+                                                    self.downloads.values())
+        except Aria2rpcException:
+            return progress_string
 
+        for file in downloads:
             if (file.failed or file.paused or
                 (file.complete and file.metadata) or file.removed):
                 continue
 
             if file.complete and not file.metadata:
                 if await file.is_dir():
-                    counter = self.uploads[file.gid]["counter"]
-                    length = len(file.files)
-                    percent = round(((counter / length) * 100), 2)
+                    upload = self.uploads[file.gid]
+                    counter = upload["counter"]
+                    length = upload.get("total", len(file.files))
+                    percent = round(((counter / length) * 100), 2) if length else 0
                     progress_string += (
                         f"`{file.name}`\nGID: `{file.gid}`\n"
                         f"__ComputingFolder: [{counter}/{length}] "
-                        f"{percent}%__\n\n")
+                        f"{percent}%__\n")
+                    if upload.get("size"):
+                        uploaded = upload["uploaded"]
+                        try:
+                            speed = round(uploaded / (util.time.sec() -
+                                                      upload["start_time"]), 2)
+                        except ZeroDivisionError:
+                            speed = 0
+                        progress_string += (
+                            f"__{human(uploaded)} of {human(upload['size'])} @ "
+                            f"{human(speed, postfix='/s')}__\n")
+                    progress_string += "\n"
                 elif await file.is_file():
                     if file.gid in self.mega:
                         M: "Mega" = self.bot.plugins["Mega"]  # type: ignore
-                        tempFile = M.file[file.gid]["file"]
-
                         fileSize = file.total_length
-                        decrypted = await (tempFile.stat()).st_size
+                        decrypted = M.file[file.gid]["decrypted"]
                         percent = round(((decrypted / fileSize) * 100))
                         progress_string += (
                             f"`{file.name}`\nGID: `{file.gid}`\n"
-                            f"Status: **Decrypting"
-                            f"__{human(decrypted)} of {human(fileSize)}"
+                            f"Status: **Decrypting**\n"
+                            f"__{human(decrypted)} of {human(fileSize)} "
                             f"{percent}%__\n\n")
                         continue
 
                     f = self.uploads[file.gid]
-                    progress, done = await self.uploadProgress(f)
+                    try:
+                        progress, done = await self.uploadProgress(f)
+                    except Exception as e:  # skipcq: PYL-W0703
+                        await self.failUpload(file, e)
+                        continue
                     if not done and progress:
                         progress_string += progress
 
                 continue
 
+            pipeline = self.pipelines.get(file.gid)
+            # Pipelined uploads can't skip what an earlier mirror already has
+            if pipeline is None and not self.drive.sync and self.pipelineable(file):
+                self.startPipeline(file)
+            elif pipeline is not None:
+                self.queueCompleted(file, pipeline)
+
             downloaded = file.completed_length
             file_size = file.total_length
             percent = file.progress
@@ -324,13 +657,59 @@ class Aria2WebSocketServer:
                 f"Status: **{file.status.capitalize()}**\n"
                 f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
                 f"__{human(downloaded)} of {human(file_size)} @ "  # type: ignore
-                f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
+                f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n")
+            if file.gid in self.pipelines:
+                progress_string += (f"__Uploaded: [{self.pipelines[file.gid]['counter']}"
+                                    f"/{len(file.files)}]__\n")
+            progress_string += "\n"
 
         return progress_string
 
+    async def failUpload(self, file: util.aria2.Download, err: Exception) -> None:
+        self.log.error(f"Upload failed: [gid: '{file.gid}']", exc_info=err)
+        async with self.lock:
+            upload = self.uploads.pop(file.gid, None)
+            self.pipelines.pop(file.gid, None)
+            self.downloads.pop(file.gid, None)
+            await self.bot.respond(self.context.msg,
+                                   f"`{file.name}`\n"
+                                   "Status: **Upload failed**\n"
+                                   f"Error: __{str(err) or type(err).__name__}__",
+                                   mode="reply")
+            await self.checkDelete()
+
+        # Folder uploads are tracked with a plain dict, nothing to discard
+        if upload is not None and not isinstance(upload, dict):
+            try:
+                await upload.discard()
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.warning(f"Can't discard upload: [gid: '{file.gid}']",
+                                 exc_info=e)
+
+    def nextSample(self, last_update_time: Optional[datetime]) -> Optional[float]:
+        """Returns how long the progress loop may sleep before sampling again.
+
+        None means there is nothing to track and the loop should wait for a
+        notification from aria2 instead."""
+
+        if not self.downloads and not self.cancelled:
+            return None
+
+        # Pending single file uploads are driven chunk by chunk from here,
+        # next_chunk already awaits the transfer of a whole chunk.
+        if any(not isinstance(upload, dict) for upload in self.uploads.values()):
+            return 0
+
+        if last_update_time is None:
+            return 0
+
+        elapsed = (datetime.now() - last_update_time).total_seconds()
+        return max(self.edit_interval - elapsed, 0.1)
+
     async def updateProgress(self) -> None:
         last_update_time = None
         while not self.stopping:
+            self.wakeup.clear()
             for gid in self.cancelled.copy():
                 async with self.lock:
                     file = None
@@ -340,29 +719,40 @@ class Aria2WebSocketServer:
                         self.log.info(f"Aborted download: [gid: '{gid}']")
                     if (file is not None and await file.is_file() and
                             gid in self.uploads):
-                        del self.uploads[gid]
+                        await self.uploads.pop(gid).discard()
                         self.log.info(f"Aborted upload file: [gid: '{gid}']")
-                    elif (file is not None and await file.is_dir() and
-                            gid in self.uploads):
+                    elif file is not None and (gid in self.pipelines or (
+                            await file.is_dir() and gid in self.uploads)):
                         for task in asyncio.all_tasks():
                             if task.get_name() == gid:
                                 task.cancel()
-                        await self.uploads[gid]["generator"].aclose()
-                        del self.uploads[gid]
+                        self.pipelines.pop(gid, None)
+                        self.uploads.pop(gid, None)
                         self.log.info(f"Aborted upload folder: [gid: '{gid}']")
                     self.cancelled.remove(gid)
                     await self.checkDelete()
 
+            if not self.downloads:
+                last_update_time = None
+                await self.wakeup.wait()
+                continue
+
             try:
                 progress = await self.checkProgress()
-            except HttpError as e:
+            except Exception as e:  # skipcq: PYL-W0703
                 self.log.error("Error on progress update", exc_info=e)
+                # Back off instead of spinning on a persistent error
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(),
+                                           timeout=self.edit_interval)
+                except asyncio.TimeoutError:
+                    pass
                 continue
             now = datetime.now()
 
             if last_update_time is None or (
-                    now - last_update_time).total_seconds() >= 5 and (progress
-                                                                      != ""):
+                    now - last_update_time).total_seconds() >= self.edit_interval and (
+                    progress != ""):
                 try:
                     if self.context is not None:
                         async with self.lock:
@@ -374,15 +764,23 @@ class Aria2WebSocketServer:
                 finally:
                     last_update_time = now
 
-            await asyncio.sleep(0.1)
+            delay = self.nextSample(last_update_time)
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Still yield to the loop between upload chunks
+                await asyncio.sleep(0)
 
     async def uploadProgress(
-            self, file: MediaFileUpload) -> Tuple[Union[str, None], bool]:
+            self, file: "ResumableUpload") -> Tuple[Union[str, None], bool]:
         time = util.time.format_duration_td
         human = util.file.human_readable_bytes
         progress = None
 
-        status, response = await util.run_sync(file.next_chunk, num_retries=5)  # type: ignore
+        status, response = await file.next_chunk(num_retries=5)
         if status:
             file_size = status.total_size
             end = util.time.sec() - file.start_time  # type: ignore
@@ -405,20 +803,7 @@ class Aria2WebSocketServer:
         if response is None and progress is not None:
             return progress, False
 
-        file_size = response.get("size")
-        mirrorLink = response.get("webContentLink")
-        fileLink = (f"**GoogleDrive Link**: [{file.name}]({mirrorLink}) "  # type: ignore
-                    f"(__{human(int(file_size))}__)")
-        if self.index_link is not None:
-            link = join(self.index_link, parse.quote(file.name))  # type: ignore
-            fileLink += f"\n\n__IndexLink__: [Here]({link})."
-
-        async with self.lock:
-            await self.bot.respond(self.context.msg, fileLink, mode="reply")
-            del self.uploads[file.gid]  # type: ignore
-            del self.downloads[file.gid]  # type: ignore
-            await self.checkDelete()
-
+        await self.replyUpload(file.gid, file.name, response)  # type: ignore
         return None, True
 
     async def seedFile(self, file: util.aria2.Download) -> Optional[str]:
@@ -426,26 +811,9 @@ class Aria2WebSocketServer:
         if not await file_path.is_file():
             return
 
-        port = util.aria2.get_free_port()
-        cmd = [
-            "aria2c", "--enable-rpc", "--rpc-listen-all=false",
-            f"--rpc-listen-port={port}", "--bt-seed-unverified=true",
-            "--seed-ratio=1", f"-i {str(file_path)}"
-        ]
-
-        future = self.bot.loop.create_future()
-        transport = None
-        try:
-            transport, protocol = await self.bot.loop.subprocess_exec(
-                lambda: SeedProtocol(future, self.log), *cmd, stdin=None)
-
-            await future
-        finally:
-            if transport:
-                transport.close()
-
-        data = bytes(protocol.output)  # type: ignore
-        return data.decode("ascii").rstrip()
+        gid = await self.seeder.add(file_path, file.dir)
+        self.log.info(f"Seeding: [gid: '{file.gid}'] as [gid: '{gid}']")
+        return gid
 
 
 class Aria2(plugin.Plugin):
@@ -479,6 +847,10 @@ class Aria2(plugin.Plugin):
     async def on_stop(self) -> None:
         if hasattr(self, "_ws"):
             self._ws.stopping = True
+            self._ws.wakeup.set()
+            if self._ws.trackers_task is not None:
+                self._ws.trackers_task.cancel()
+            await self._ws.seeder.stop()
             await self.client.shutdown()
             await self.client.close()
             self._ws.context = None  # type: ignore
@@ -544,4 +916,5 @@ class Aria2(plugin.Plugin):
             return "__GID belongs to finished Metadata, can't be abort.__"
 
         self._ws.cancelled.add(gid)
+        self._ws.wakeup.set()
         return ret
@@ -59,6 +59,23 @@ class Debug(plugin.Plugin):
         return status
 
 
+    @command.desc("Show how busy the executors are")
+    async def cmd_executors(self, ctx: command.Context) -> str:
+        text = "**Executors**\n\n"
+        if not util.async_helper.pools:
+            return text + "__No executor started yet.__"
+
+        for pool in util.async_helper.pools.values():
+            stats = pool.stats
+            text += (f"`{stats['name']}` (__{stats['size']} workers__)\n"
+                     f"{stats['pending']} running, {stats['queued']} queued, "
+                     f"{stats['calls']} calls\n"
+                     f"__Wait: {stats['average_wait'] * 1000:.1f} ms average, "
+                     f"{stats['max_wait'] * 1000:.1f} ms max__\n\n")
+
+        return text
+
+
     @command.usage("[code]")
     @command.desc("Run python code to debugging")
     @command.filters(pyrogram.filters.user(OWNER))  # Only for owners, lazy hax use env
@@ -1,23 +1,39 @@
 import asyncio
 import base64
 import json
+import mmap
+import random
 import re
+import threading
+import weakref
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Any, AsyncIterator, ClassVar, Iterable, List, MutableMapping, Optional, Set, Tuple, Union
-
+from os.path import join
+from pathlib import PurePosixPath
+from time import monotonic
+from typing import (Any, AsyncIterator, Callable, ClassVar, Deque, Dict, Iterable, List,
+                    MutableMapping, Optional, Set, Tuple, Union)
+from urllib import parse
+
+import aiohttp
 import pyrogram
 from aiopath import AsyncPath
 from google.auth.transport.requests import Request
+from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build, Resource
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import BatchHttpRequest, HttpRequest, build_http
 from oauthlib.oauth2.rfc6749.errors import InvalidGrantError
+from pymongo import DeleteOne, ReplaceOne
 
 from .. import command, plugin, util
 
+BATCH_URL = "https://www.googleapis.com/batch/drive/v3"
 FOLDER = "application/vnd.google-apps.folder"
+INDEX_FIELDS = "id, name, mimeType, size, parents, modifiedTime, webViewLink, trashed"
 MIME_TYPE = {
     "application/gzip": "📦",
     "application/octet-stream": "⚙️",
@@ -42,6 +58,7 @@ MIME_TYPE = {
     "video/mp4": "🎥️",
     "video/x-matroska": "🎥️"
 }
+PARENTS = re.compile(r"'([\w-]+)' in parents")
 PATTERN = re.compile(r"(?<=/folders/)([\w-]+)|(?<=%2Ffolders%2F)([\w-]+)|"
                      r"(?<=/file/d/)([\w-]+)|(?<=%2Ffile%2Fd%2F)([\w-]+)|"
                      r"(?<=id=)([\w-]+)|(?<=id%3D)([\w-]+)")
@@ -49,6 +66,47 @@ DOMAIN = re.compile(r"https?:\/\/(?:www\.|:?www\d+\.|(?!www))"
                     r"([a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9])\.[^\s]{2,}")
 
 
+QUOTA_LIMITS = {"uploadLimitExceeded"}
+RATE_LIMITS = {"rateLimitExceeded", "userRateLimitExceeded"}
+SCOPES = ["https://www.googleapis.com/auth/drive"]
+# Cache tag of listings not bound to a parent, any write may change them
+SEARCH = "search"
+
+
+def isRateLimited(error: BaseException) -> bool:
+    if isinstance(error, HttpError):
+        return error.resp.status == 429 or error.resp.status == 403 and any(
+            reason in str(error.content) for reason in RATE_LIMITS)
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status == 403 and error.message in RATE_LIMITS
+
+    return False
+
+
+def isQuotaExceeded(error: BaseException) -> bool:
+    if isinstance(error, HttpError):
+        return error.resp.status == 403 and any(
+            reason in str(error.content) for reason in QUOTA_LIMITS)
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 403 and error.message in QUOTA_LIMITS
+
+    return False
+
+
+def isTransient(error: BaseException) -> bool:
+    if isinstance(error, HttpError):
+        return error.resp.status >= 500
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500
+
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                              asyncio.TimeoutError))
+
+
+def tokenize(name: str) -> List[str]:
+    return re.findall(r"\w+", name.lower())
+
+
 def getIdFromUrl(url: Optional[str]) -> Optional[str]:
     if not url:
         return None
@@ -57,31 +115,369 @@ def getIdFromUrl(url: Optional[str]) -> Optional[str]:
     return match[0] if match else url
 
 
+_local = threading.local()
+
+
+def localHttp(credentials: Any) -> AuthorizedHttp:
+    """Returns the calling thread's transport for credentials.
+
+    httplib2.Http isn't thread safe, so requests running on the drive pool
+    can't share the one their service was built with."""
+
+    transports = getattr(_local, "transports", None)
+    if transports is None:
+        transports = _local.transports = weakref.WeakKeyDictionary()
+
+    http = transports.get(credentials)
+    if http is None:
+        http = transports[credentials] = AuthorizedHttp(credentials, http=build_http())
+
+    return http
+
+
+def executeRequest(request: Union[HttpRequest, BatchHttpRequest],
+                   credentials: Any) -> Any:
+    return request.execute(http=localHttp(credentials))
+
+
+class ServiceAccount:
+    """A service account of the upload pool and what it moved today."""
+
+    # Drive refuses uploads and copies past this, per account and day
+    quota: ClassVar[int] = 750 * 1024 ** 3
+
+    email: str
+    credentials: service_account.Credentials
+    service: Optional[Resource]
+    day: str
+    used: int
+
+    def __init__(self, key: MutableMapping[str, Any], day: str = "", used: int = 0) -> None:
+        self.email = key["client_email"]
+        self.credentials = service_account.Credentials.from_service_account_info(
+            key, scopes=SCOPES)
+        self.service = None
+        self.day = day
+        self.used = used
+
+    @staticmethod
+    def today() -> str:
+        return datetime.utcnow().strftime("%Y-%m-%d")
+
+    def rollover(self) -> None:
+        today = self.today()
+        if self.day != today:
+            self.day, self.used = today, 0
+
+    @property
+    def remaining(self) -> int:
+        self.rollover()
+        return max(self.quota - self.used, 0)
+
+
+class ResumableUpload:
+    """Uploads a local file through a Drive resumable session on the event loop.
+
+    next_chunk mirrors googleapiclient's HttpRequest, returning itself as the
+    status until the file resource comes back. The file is mapped once and
+    every chunk is sent as slices of that mapping, so nothing is copied into
+    intermediate bytes objects and no thread is involved.
+
+    The session is recorded in the gdrive collection along with the last
+    offset Drive acknowledged, so GoogleDrive.resumeUploads can pick it up
+    again after a restart.
+
+    Chunk size adapts to the link: after every chunk the measured throughput
+    picks the size that takes about target_duration to send, so slow links
+    still report progress often and fast links don't pay a round trip every
+    few megabytes."""
+
+    # Drive only accepts chunks in multiples of 256 KiB
+    chunk_unit: ClassVar[int] = 256 * 1024
+    initial_chunksize: ClassVar[int] = 32 * 256 * 1024
+    min_chunksize: ClassVar[int] = 256 * 1024
+    max_chunksize: ClassVar[int] = 1024 * 256 * 1024
+    target_duration: ClassVar[float] = 5.0
+
+    drive: "GoogleDrive"
+    path: AsyncPath
+    session: str
+    total_size: int
+    offset: int
+    resumable_progress: int
+
+    account: Optional[ServiceAccount]
+    gid: Optional[str]
+    name: Optional[str]
+    mime_type: Optional[str]
+    parent_id: Optional[str]
+    start_time: Optional[int]
+    chat_id: Optional[int]
+
+    chunksize: int
+    throughput: Optional[float]
+    latency: Optional[float]
+    sizes: List[int]
+
+    _file: Any
+    _map: Optional[mmap.mmap]
+    _stale: bool
+    _written_at: float
+
+    def __init__(self, drive: "GoogleDrive", path: AsyncPath, session: str,
+                 size: int, *, account: Optional[ServiceAccount] = None) -> None:
+        self.drive = drive
+        self.path = path
+        self.session = session
+        self.total_size = size
+        self.offset = 0
+        self.resumable_progress = 0
+
+        self.account = account
+        self.gid = None
+        self.name = None
+        self.mime_type = None
+        self.parent_id = None
+        self.start_time = None
+        self.chat_id = None
+
+        self.chunksize = self.initial_chunksize
+        self.throughput = None
+        self.latency = None
+        self.sizes = []
+
+        self._file = None
+        self._map = None
+        self._stale = False
+        self._written_at = 0.0
+
+    @property
+    def stats(self) -> MutableMapping[str, Any]:
+        return {
+            "name": self.name,
+            "size": self.total_size,
+            "chunksize": self.chunksize,
+            "throughput": self.throughput,
+            "latency": self.latency,
+            "sizes": self.sizes
+        }
+
+    def _advance(self, length: int) -> None:
+        self.resumable_progress += length
+        self._written_at = monotonic()
+
+    def _adapt(self, length: int, started: float) -> None:
+        """Picks the next chunk size from how the last one went."""
+
+        now = monotonic()
+        # Socket buffers swallow the tail of a chunk, so only the whole round
+        # trip says how fast the link really is. Latency is kept for stats.
+        rate = length / max(now - started, 0.001)
+        latency = now - self._written_at
+        if self.throughput is None or self.latency is None:
+            self.throughput, self.latency = rate, latency
+        else:
+            self.throughput = (self.throughput + rate) / 2
+            self.latency = (self.latency + latency) / 2
+
+        # Grow gradually, shrinking is immediate
+        wanted = min(int(self.throughput * self.target_duration), self.chunksize * 2)
+        wanted -= wanted % self.chunk_unit
+        self.chunksize = min(max(wanted, self.min_chunksize), self.max_chunksize)
+
+    def close(self) -> None:
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:  # A cancelled request still holds a slice
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def save(self) -> None:
+        stat = await self.path.stat()
+        await self.drive.writer.update_one({"_id": self.session}, {
+            "$set": {
+                "upload": True,
+                "path": str(self.path),
+                "size": self.total_size,
+                "mtime": stat.st_mtime,
+                "offset": self.offset,
+                "name": self.name,
+                "mime_type": self.mime_type,
+                "parent_id": self.parent_id,
+                "account": self.account.email if self.account is not None else None,
+                "gid": self.gid,
+                "chat_id": self.chat_id
+            }
+        }, upsert=True)
+
+    async def discard(self) -> None:
+        self.close()
+        await self.drive.writer.delete_one({"_id": self.session})
+
+    async def failover(self) -> bool:
+        """Starts over on the account with the most quota left.
+
+        Sessions belong to the account that opened them, so whatever the
+        exhausted account already sent can't be carried over."""
+
+        if self.account is not None:
+            await self.drive.exhaustAccount(self.account)
+        account = self.drive.pickAccount()
+        if account is None or account is self.account:
+            return False
+
+        session = await self.drive.createSession(self.name or self.path.name,
+                                                 self.mime_type, self.total_size,
+                                                 self.parent_id, account=account)
+        await self.drive.writer.delete_one({"_id": self.session})
+        self.drive.log.info(f"Moving upload of '{self.name}' to {account.email}")
+
+        self.session, self.account = session, account
+        self.offset = self.resumable_progress = 0
+        self._stale = False
+        await self.save()
+        return True
+
+    async def next_chunk(
+        self, num_retries: int = 5
+    ) -> Tuple[Optional["ResumableUpload"], Optional[MutableMapping[str, Any]]]:
+        if self._map is None:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        attempt = 0
+        while True:
+            try:
+                if self._stale:
+                    async with self.drive.governor["media"]:
+                        self.offset, response = await self.drive.putChunk(
+                            self.session, b"", self.offset, self.total_size,
+                            account=self.account)
+                    self._stale = False
+                else:
+                    start = self.offset
+                    end = min(start + self.chunksize, self.total_size)
+                    self.resumable_progress = start
+                    self.sizes.append(end - start)
+                    async with self.drive.governor["media"]:
+                        started = self._written_at = monotonic()
+                        self.offset, response = await self.drive.putChunk(
+                            self.session, memoryview(self._map)[start:end],
+                            start, self.total_size, progress=self._advance,
+                            account=self.account)
+                    if self.account is not None:
+                        await self.drive.chargeAccount(self.account,
+                                                       max(self.offset - start, 0))
+                    if response is None and self.offset > start:
+                        self._adapt(self.offset - start, started)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isQuotaExceeded(e):
+                    try:
+                        moved = await self.failover()
+                    except BaseException:
+                        await self.discard()
+                        raise
+                    if moved:
+                        continue
+                if not (isRateLimited(e) or isTransient(e)) or attempt >= num_retries:
+                    await self.discard()
+                    raise
+
+                # Ask Drive how much it kept before sending again, and retry
+                # with a smaller chunk so the next failure costs less
+                attempt += 1
+                self._stale = True
+                self.chunksize = max(self.chunksize // 2 - self.chunksize // 2 %
+                                     self.chunk_unit, self.min_chunksize)
+                await asyncio.sleep(random.uniform(0, 2 ** attempt))
+                continue
+            except asyncio.CancelledError:
+                # Keep the record when the bot is going down, so it resumes
+                if self.drive.bot.stopping:
+                    self.close()
+                else:
+                    await self.discard()
+                raise
+            except BaseException:
+                self.close()
+                raise
+
+            self.resumable_progress = self.offset
+            if response is not None:
+                self.drive.upload_stats.append(self.stats)
+                self.drive.forget(self.parent_id or self.drive.parent_id,
+                                  response.get("id"))
+                await self.discard()
+                return None, response
+            if not self._stale:
+                await self.drive.writer.update_one({"_id": self.session},
+                                                   {"$set": {"offset": self.offset}})
+                return self, None
+
+
 class GoogleDrive(plugin.Plugin):
     name: ClassVar[str] = "GoogleDrive"
+    files_url: ClassVar[str] = "https://www.googleapis.com/drive/v3/files"
+    upload_url: ClassVar[str] = "https://www.googleapis.com/upload/drive/v3/files"
+    # Slices written to the socket per await while sending a chunk
+    write_size: ClassVar[int] = 1024 * 1024
+    # Resumable upload chunks must be a multiple of 256 KiB
+    stream_chunk: ClassVar[int] = 32 * 256 * 1024
+    # Folder listings and file copies gdcopy keeps in flight
+    copy_listers: ClassVar[int] = 8
+    copy_workers: ClassVar[int] = 16
+    # Boots an interrupted gdcopy is resumed on before it is given up
+    copy_resumes: ClassVar[int] = 3
+    # Changes made outside the bot show up after at most metadata_ttl seconds
+    metadata_ttl: ClassVar[float] = 60.0
+    metadata_size: ClassVar[int] = 1024
+    # Seconds between two polls of the Changes API
+    index_interval: ClassVar[float] = 60.0
 
     configs: MutableMapping[str, Any]
     credentials: Optional[Credentials]
     db: util.db.AsyncCollection
+    index: util.db.AsyncCollection
+    ledger: util.db.AsyncCollection
+    # Coalesce the frequent small writes to db and ledger
+    ledger_writer: util.db.AsyncBulkWriter
+    writer: util.db.AsyncBulkWriter
     service: Resource
 
+    accounts: Dict[str, ServiceAccount]
     aria2: Any
-    cache: MutableMapping[int, int]
-    copy_tasks: Set[Tuple[int, str]]
+    batcher: util.batch.Batcher[HttpRequest, Any]
+    governor: util.governor.Governor
+    copy_tasks: Set[Tuple[int, asyncio.Task[Any]]]
     index_link: Optional[str]
+    indexed: bool
+    indexer: Optional[asyncio.Task[None]]
+    metadata: util.cache.TTLCache[Any]
     parent_id: Optional[str]
+    sync: bool
     tasks: Set[Tuple[int, asyncio.Task[Any]]]
+    upload_stats: Deque[MutableMapping[str, Any]]
+    upload_workers: int
 
     getDirectLink: util.aria2.DirectLinks
 
     async def on_load(self) -> None:
         self.credentials = None
         self.db = self.bot.db.get_collection("gdrive")
+        # Source to destination id of everything an unfinished gdcopy has copied
+        self.ledger = self.bot.db.get_collection("gdrive_copy")
+        # Local copy of the metadata of every file, gdsearch answers from it
+        self.index = self.bot.db.get_collection("gdrive_index")
         self.index_link = self.bot.config["gdrive_index_link"]
         self.parent_id = getIdFromUrl(self.bot.config["gdrive_folder_id"])
         self.tasks = set()
+        self.upload_workers = self.bot.config["gdrive_upload_workers"] or 4
+        self.sync = bool(self.bot.config["gdrive_sync"])
 
-        self.cache = {}
         self.copy_tasks = set()
 
         data = await self.db.find_one({"_id": 1})
@@ -104,13 +500,284 @@ class GoogleDrive(plugin.Plugin):
 
     async def on_start(self, _: int) -> None:
         self.getDirectLink = util.aria2.DirectLinks(self.bot.http)
+        # Kept here rather than on_load, which reruns on every credential refresh
+        self.upload_stats = deque(maxlen=10)
+        self.metadata = util.cache.TTLCache(ttl=self.metadata_ttl,
+                                            maxsize=self.metadata_size)
+        self.governor = util.governor.Governor(limited=isRateLimited,
+                                               transient=isTransient)
+        self.governor.add("metadata", rate=10, burst=20, concurrency=4, maximum=32)
+        self.governor.add("media", rate=10, burst=10, concurrency=4, maximum=16)
+        # Drive takes at most 100 calls per batch, requests made with different
+        # credentials can't share one.
+        self.batcher = util.batch.Batcher(self.sendBatch, size=100, delay=0.05,
+                                          key=lambda request: id(request.http))
+
+        self.writer = self.db.bulk_writer()
+        self.ledger_writer = self.ledger.bulk_writer(ordered=False)
+        await self.ledger.create_index([("job", 1), ("source", 1)], unique=True)
+        await asyncio.gather(
+            self.index.create_index("tokens"), self.index.create_index("parents"),
+            self.index.create_index([("folder", -1), ("modifiedTime", -1), ("name", 1)]))
+        self.indexed = False
+        self.indexer = None
+
+        self.accounts = {}
+        async for record in self.db.find({"service_account": {"$exists": True}}):
+            self.accounts[record["_id"]] = ServiceAccount(record["service_account"],
+                                                         record.get("day", ""),
+                                                         record.get("used", 0))
+
+    async def on_started(self) -> None:
+        if self.credentials is not None:
+            self.bot.loop.create_task(self.resumeUploads())
+            self.bot.loop.create_task(self.resumeCopies())
+            self.indexer = self.bot.loop.create_task(self.syncIndex())
+
+    async def on_stop(self) -> None:
+        if self.indexer is not None:
+            self.indexer.cancel()
+
+    async def resumeUploads(self) -> None:
+        """Continues the resumable sessions left behind by the last run."""
+
+        uploads = []
+        async for record in self.db.find({"upload": True}):
+            path = AsyncPath(record["path"])
+            try:
+                stat = await path.stat()
+            except FileNotFoundError:
+                stat = None
+            if stat is None or (stat.st_size != record["size"] or
+                                stat.st_mtime != record["mtime"]):
+                self.log.warning(f"Dropping upload of '{path}', file changed")
+                await self.db.delete_one({"_id": record["_id"]})
+                continue
+
+            email = record.get("account")
+            content = ResumableUpload(self, path, record["_id"], record["size"],
+                                      account=self.accounts.get(email) if email else None)
+            content.name, content.gid, content.chat_id = (record["name"], record["gid"],
+                                                          record["chat_id"])
+            content.mime_type = record.get("mime_type")
+            content.parent_id = record.get("parent_id")
+            content.offset = record["offset"]
+            content.start_time = util.time.sec()
+            content._stale = True  # Drive knows better what it has committed
+            uploads.append(self.finishUpload(content))
+
+        # One broken session must not leave the others unwatched
+        for result in await asyncio.gather(*uploads, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.log.error("Failed to resume upload", exc_info=result)
+
+    async def finishUpload(self, content: ResumableUpload) -> None:
+        self.log.info(f"Resuming upload of '{content.name}' "
+                      f"from {util.file.human_readable_bytes(content.offset)}")
+        name = content.name or content.path.name
+        chat_id = content.chat_id or self.bot.owner
+        try:
+            response = None
+            while response is None:
+                _, response = await content.next_chunk(num_retries=5)
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.error(f"Resumed upload of '{name}' failed", exc_info=e)
+            await self.bot.client.send_message(
+                chat_id, f"`{name}`\nStatus: **Upload failed**\n"
+                f"Error: __{str(e) or type(e).__name__}__")
+            return
+
+        text = (f"**GoogleDrive Link**: [{name}]({response.get('webContentLink')}) "
+                f"(__{util.file.human_readable_bytes(int(response['size']))}__)")
+        if self.index_link is not None:
+            text += (f"\n\n__Shareable link__: "
+                     f"[Here]({join(self.index_link, parse.quote(name))}).")
+
+        await self.bot.client.send_message(chat_id, text)
+
+    async def resumeCopies(self) -> None:
+        """Continues the folder copies left unfinished by the last run."""
+
+        async def resume(record: MutableMapping[str, Any]) -> None:
+            self.log.info(f"Resuming copy of '{record['name']}'")
+            state: MutableMapping[str, Any] = {}
+            try:
+                await self.copyFolder(record["copy"], parent_id=record["destination"],
+                                      state=state)
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.error(f"Resumed copy of '{record['name']}' failed", exc_info=e)
+                attempts = record.get("attempts", 0) + 1
+                if (isRateLimited(e) or isTransient(e)) and attempts < self.copy_resumes:
+                    await self.db.update_one({"copy": record["copy"]},
+                                             {"$set": {"attempts": attempts}})
+                    return
+
+                # Source or destination is gone for good, don't retry every boot
+                await self.finishCopy(record["copy"])
+                await self.bot.client.send_message(
+                    record.get("chat_id") or self.bot.owner,
+                    f"Copying failed: `{record['name']}`\n"
+                    f"Error: __{str(e) or type(e).__name__}__")
+                return
+
+            await self.finishCopy(record["copy"])
+            ret = await self.getInfo(record["destination"], ["webViewLink"])
+            await self.bot.client.send_message(
+                record.get("chat_id") or self.bot.owner,
+                f"Copying success: [{record['name']}]({ret['webViewLink']}) "
+                f"(__{state['skipped']} of {state['total']} files already copied__)")
+
+        for result in await asyncio.gather(*[
+            resume(record) async for record in self.db.find({"copy": {"$exists": True}})
+        ], return_exceptions=True):
+            if isinstance(result, Exception):
+                self.log.error("Failed to resume copy", exc_info=result)
+
+    @staticmethod
+    def indexRequest(file_id: str, file: Optional[MutableMapping[str, Any]]
+                     ) -> Union[DeleteOne, ReplaceOne]:
+        if file is None or file.get("trashed"):
+            return DeleteOne({"_id": file_id})
+
+        return ReplaceOne({"_id": file_id}, {
+            "name": file["name"],
+            "tokens": tokenize(file["name"]),
+            "mimeType": file["mimeType"],
+            "folder": file["mimeType"] == FOLDER,
+            "size": int(file.get("size", 0)),
+            "parents": file.get("parents", []),
+            "modifiedTime": file.get("modifiedTime"),
+            "webViewLink": file.get("webViewLink")
+        }, upsert=True)
+
+    async def syncIndex(self) -> None:
+        """Builds the local index of Drive once, then keeps it current by
+        polling the Changes API from the stored page token."""
+
+        token: Optional[str] = None
+        while True:
+            try:
+                if token is None:
+                    token = await self.buildIndex()
+                    self.indexed = True
+                    continue
+
+                token = await self.pollChanges(token)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.warning("Failed to sync GoogleDrive index", exc_info=e)
+
+            await asyncio.sleep(self.index_interval)
+
+    async def buildIndex(self) -> str:
+        """Returns the stored page token, crawling the whole Drive first if
+        there is none yet."""
+
+        record = await self.db.find_one({"_id": "changes"})
+        if record is not None:
+            return record["token"]
+
+        # Taken before the crawl so nothing changed during it gets lost
+        response = await self.execute(self.service.changes(  # type: ignore
+            ).getStartPageToken(supportsAllDrives=True))
+        token = response["startPageToken"]
+        self.log.info("Building GoogleDrive index")
+        await self.crawlIndex()
+        await self.db.update_one({"_id": "changes"}, {"$set": {"token": token}},
+                                 upsert=True)
+        return token
+
+    async def crawlIndex(self) -> None:
+        await self.index.delete_many({})
+
+        pageToken = None
+        while True:
+            response = await self.execute(self.service.files().list(  # type: ignore
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+                q="trashed = false",
+                spaces="drive",
+                corpora="allDrives",
+                fields=f"nextPageToken, files({INDEX_FIELDS})",
+                pageSize=1000,
+                pageToken=pageToken))
+
+            files = response.get("files", [])
+            if files:
+                await self.index.bulk_write(
+                    [self.indexRequest(file["id"], file) for file in files],
+                    ordered=False)
+
+            pageToken = response.get("nextPageToken")
+            if pageToken is None:
+                break
+
+    async def pollChanges(self, token: str) -> str:
+        """Applies every change since token to the index, returns the token to
+        poll from next."""
+
+        while True:
+            response = await self.execute(self.service.changes().list(  # type: ignore
+                pageToken=token,
+                pageSize=1000,
+                includeItemsFromAllDrives=True,
+                supportsAllDrives=True,
+                includeRemoved=True,
+                spaces="drive",
+                fields=("nextPageToken, newStartPageToken, "
+                        f"changes(changeType, fileId, removed, file({INDEX_FIELDS}))")))
+
+            requests = []
+            for change in response.get("changes", []):
+                # Shared drive changes carry no fileId, the index only has files
+                if change.get("changeType") != "file":
+                    continue
+
+                file = None if change.get("removed") else change.get("file")
+                requests.append(self.indexRequest(change["fileId"], file))
+                # Also keeps the metadata cache fresh for changes made elsewhere
+                self.forget(change["fileId"], *(file or {}).get("parents", []))
+            if requests:
+                # A file may change more than once within a page, the last one wins
+                await self.index.bulk_write(requests, ordered=True)
+
+            token = response.get("nextPageToken") or response["newStartPageToken"]
+            await self.db.update_one({"_id": "changes"}, {"$set": {"token": token}},
+                                     upsert=True)
+            if "newStartPageToken" in response:
+                return token
+
+    async def searchIndex(self, *, name: Optional[str], parent: Optional[str],
+                          folder: Optional[bool], limit: int
+                          ) -> List[MutableMapping[str, Any]]:
+        """Matches every word of name against the start of a word of the file
+        names in the index."""
+
+        query: MutableMapping[str, Any] = {}
+        if name is not None:
+            words = tokenize(name)
+            if not words:
+                return []
+
+            query["tokens"] = {
+                "$all": [re.compile(f"^{re.escape(word)}") for word in words]
+            }
+        if parent is not None:
+            query["parents"] = parent
+        if folder is not None:
+            query["folder"] = folder
+
+        cursor = self.index.find(query).sort([("folder", -1), ("modifiedTime", -1),
+                                              ("name", 1)]).limit(limit)
+        return await cursor.to_list(limit)
 
     async def check_credentials(self, ctx: command.Context) -> None:
         if not self.credentials or not self.credentials.valid:
             if self.credentials and self.credentials.expired and (
                     self.credentials.refresh_token):
                 self.log.info("Refreshing credentials")
-                await util.run_sync(self.credentials.refresh, Request())
+                await util.run_sync(self.credentials.refresh, Request(), pool="drive")
 
                 await self.db.update_one(
                     {"_id": 1},
@@ -143,8 +810,15 @@ class GoogleDrive(plugin.Plugin):
         if not self.credentials:
             return "__Credentials already empty.__"
 
-        await asyncio.gather(self.db.delete_one({"_id": 1}),
+        if self.indexer is not None:
+            self.indexer.cancel()
+            self.indexer, self.indexed = None, False
+
+        # The index and its page token belong to the account being cleared
+        await asyncio.gather(self.db.delete_many({"_id": {"$in": [1, "changes"]}}),
+                             self.index.delete_many({}),
                              ctx.respond("__Credentials cleared.__"))
+        self.metadata.clear()
         await self.on_load()
 
     async def getAccessToken(self, ctx: command.Context) -> str:
@@ -186,50 +860,273 @@ class GoogleDrive(plugin.Plugin):
 
         return "Credentials created."
 
+    async def execute(self, request: Any) -> Any:
+        """Runs a googleapiclient request through the metadata lane."""
+
+        return await self.governor["metadata"].call(util.run_sync, executeRequest,
+                                                    request, request.http.credentials,
+                                                    pool="drive")
+
+    async def batch(self, request: HttpRequest, retries: int = 5) -> Any:
+        """Runs a request as part of the next batch.
+
+        A throttled or failed item is retried on its own in a later batch, the
+        rest of its batch is not affected."""
+
+        lane = self.governor["metadata"]
+        attempt = 0
+        while True:
+            try:
+                return await self.batcher.submit(request)
+            except Exception as e:  # skipcq: PYL-W0703
+                if attempt >= retries or not lane.retryable(e):
+                    raise
+
+                attempt += 1
+                await lane.backoff(attempt)
+
+    async def sendBatch(self, requests: List[HttpRequest]) -> List[Any]:
+        results: List[Any] = [None] * len(requests)
+
+        def callback(request_id: str, response: Any, exception: Optional[HttpError]
+                     ) -> None:
+            results[int(request_id)] = exception if exception is not None else response
+
+        batch = BatchHttpRequest(callback=callback, batch_uri=BATCH_URL)
+        for index, request in enumerate(requests):
+            batch.add(request, request_id=str(index))
+
+        # The whole batch takes one slot, a throttled item counts as a
+        # throttled call so the lane still backs off.
+        lane = self.governor["metadata"]
+        await lane.acquire()
+        error: Optional[BaseException] = None
+        try:
+            # Batches are keyed by transport, so all requests share credentials
+            await util.run_sync(executeRequest, batch, requests[0].http.credentials,
+                                pool="drive")
+            error = next((result for result in results
+                          if isinstance(result, HttpError) and isRateLimited(result)),
+                         None)
+        except Exception as e:  # skipcq: PYL-W0703
+            error = e
+            raise
+        finally:
+            await lane.release(error)
+
+        return results
+
+    @staticmethod
+    async def raiseForStatus(resp: aiohttp.ClientResponse) -> None:
+        """Like raise_for_status, but keeps the reason Drive gave."""
+
+        if resp.status < 400:
+            return
+
+        try:
+            reason = (await resp.json())["error"]["errors"][0]["reason"]
+        except (aiohttp.ContentTypeError, json.JSONDecodeError, KeyError, IndexError):
+            reason = resp.reason or ""
+        raise aiohttp.ClientResponseError(resp.request_info, resp.history,
+                                          status=resp.status, message=reason,
+                                          headers=resp.headers)
+
+    def forget(self, *identifiers: Optional[str]) -> None:
+        """Drops cached metadata a write to identifiers may have made stale,
+        pass the changed files together with their parents."""
+
+        self.metadata.invalidate(SEARCH, *filter(None, identifiers))
+
     async def getInfo(self, identifier: str,
                       fields: Iterable[str]) -> MutableMapping[str, Any]:
         fields = ", ".join(fields)
 
-        return await util.run_sync(self.service.files().get(  # type: ignore
-            fileId=identifier, fields=fields, supportsAllDrives=True).execute)
+        key = ("get", identifier, fields)
+        info = self.metadata.get(key)
+        if info is None:
+            info = await self.execute(self.service.files().get(  # type: ignore
+                fileId=identifier, fields=fields, supportsAllDrives=True))
+            self.metadata.put(key, info, tags=(identifier,))
+
+        return info
 
-    async def copyFile(self, file_id: str, parent_id: Optional[str] = None) -> str:
+    async def copyFile(self, file_id: str, parent_id: Optional[str] = None,
+                       size: int = 0) -> str:
         metadata = {}
         if parent_id is not None:
             metadata["parents"] = [parent_id]
         elif parent_id is None and self.parent_id is not None:
             metadata["parents"] = [self.parent_id]
 
-        file = await util.run_sync(self.service.files().copy(  # type: ignore
-            body=metadata, fileId=file_id, supportsAllDrives=True).execute)
-        return file["id"]
+        account = self.pickAccount()
+        while True:
+            service = self.service if account is None else await self.accountService(account)
+            try:
+                file = await self.batch(service.files().copy(  # type: ignore
+                    body=metadata, fileId=file_id, supportsAllDrives=True))
+            except HttpError as e:
+                if not isQuotaExceeded(e) or account is None:
+                    raise
 
-    async def copyFolder(self, target: str, *, parent_id: Optional[str] = None,
-                         name: Optional[str] = None, msg_id: Optional[int] = None
-                         ) -> AsyncIterator[asyncio.Task]:
-        query = f"'{target}' in parents"
+                await self.exhaustAccount(account)
+                account = self.pickAccount()
+                if account is None:
+                    raise
 
-        async for contents in self.searchContent(query=query, limit=1000):
-            if msg_id is not None:
-                self.cache[msg_id] += len(contents)
+                continue
 
-            for content in contents:
-                if content["mimeType"] == FOLDER:
-                    # Dont count folder
-                    if msg_id is not None:
-                        self.cache[msg_id] -= 1
-                    childFolder = await self.createFolder(content["name"],
-                                                          folderId=parent_id)
-                    async for task in self.copyFolder(target=content["id"],
-                                                      parent_id=childFolder,
-                                                      name=name, msg_id=msg_id):
-                        yield task
-                else:
-                    yield self.bot.loop.create_task(self.copyFile(
-                                                    content["id"],
-                                                    parent_id=parent_id),
-                                                    name=name)
-                    await asyncio.sleep(0.5)
+            self.forget(metadata.get("parents", [None])[0], file["id"])
+            if account is not None:
+                await self.chargeAccount(account, size)
+            return file["id"]
+
+    async def copyDestination(self, content: MutableMapping[str, Any],
+                              chat_id: int) -> str:
+        """Returns the folder an earlier, unfinished copy of content went to,
+        or creates a new one and starts a ledger for it."""
+
+        job = await self.db.find_one({"copy": content["id"]})
+        if job is not None:
+            try:
+                destination = await self.getInfo(job["destination"], ["id", "trashed"])
+            except HttpError:
+                destination = None
+
+            if destination is not None and not destination.get("trashed"):
+                return job["destination"]
+
+            await self.finishCopy(content["id"])
+
+        folderId = await self.createFolder(content["name"])
+        await self.db.insert_one({"copy": content["id"], "destination": folderId,
+                                  "name": content["name"], "chat_id": chat_id})
+        return folderId
+
+    async def finishCopy(self, target: str) -> None:
+        # Entries still queued would otherwise land after the delete
+        await self.ledger_writer.flush()
+        await asyncio.gather(self.db.delete_one({"copy": target}),
+                             self.ledger.delete_many({"job": target}))
+
+    async def copyFolder(self, target: str, *, parent_id: str,
+                         state: MutableMapping[str, Any]) -> None:
+        """Copies everything under target into parent_id.
+
+        The tree is listed breadth first with a bounded number of listings in
+        flight, so the exact file count is known before copying starts. Each
+        level of folders is then created as one batch and files are copied by
+        a pool of workers. state receives the scanned, skipped, counter and
+        total counts.
+
+        Everything copied is recorded in the ledger of target, running it again
+        after a failure skips what the ledger has, or what the destination
+        already holds under the same name and md5Checksum."""
+
+        lister = asyncio.Semaphore(self.copy_listers)
+
+        async def listFolder(folderId: str,
+                             count: bool = True) -> List[MutableMapping[str, Any]]:
+            async with lister:
+                contents: List[MutableMapping[str, Any]] = []
+                async for page in self.searchContent(
+                        query=f"'{folderId}' in parents and trashed = false", limit=1000):
+                    # Pages are shared with the cache, items get a parent set below
+                    contents.extend(dict(content) for content in page)
+                    if count:
+                        state["scanned"] += len(page)
+
+                return contents
+
+        async def record(source: str, destination: str) -> None:
+            await self.ledger_writer.update_one({"job": target, "source": source},
+                                                {"$set": {"destination": destination}},
+                                                upsert=True)
+
+        state.update(scanned=0, skipped=0, counter=0, total=0)
+        ledger: Dict[str, str] = {}
+        async for entry in self.ledger.find({"job": target}):
+            ledger[entry["source"]] = entry["destination"]
+
+        levels: List[List[MutableMapping[str, Any]]] = []
+        files: List[MutableMapping[str, Any]] = []
+        level = [target]
+        while level:
+            folders: List[MutableMapping[str, Any]] = []
+            listings = await asyncio.gather(*(listFolder(folderId) for folderId in level))
+            for folderId, contents in zip(level, listings):
+                for content in contents:
+                    content["parent"] = folderId
+                    if content["mimeType"] == FOLDER:
+                        folders.append(content)
+                    else:
+                        files.append(content)
+
+            if folders:
+                levels.append(folders)
+            level = [folder["id"] for folder in folders]
+
+        state["total"] = len(files)
+
+        destination = {target: parent_id}
+        for folders in levels:
+            missing = [folder for folder in folders if folder["id"] not in ledger]
+            folderIds = await asyncio.gather(*(
+                self.createFolder(folder["name"], destination[folder["parent"]])
+                for folder in missing))
+            await asyncio.gather(*(record(folder["id"], folderId)
+                                   for folder, folderId in zip(missing, folderIds)))
+            ledger.update(zip((folder["id"] for folder in missing), folderIds))
+            destination.update((folder["id"], ledger[folder["id"]]) for folder in folders)
+
+        # Copies that went through without making it into the ledger can only
+        # sit in folders an earlier run created.
+        existing: Dict[str, Dict[Tuple[str, str], str]] = {}
+        if ledger:
+            resumed = [parent_id] + [destination[folder["id"]] for folders in levels
+                                     for folder in folders]
+            listings = await asyncio.gather(*(listFolder(folderId, count=False)
+                                              for folderId in resumed))
+            for folderId, contents in zip(resumed, listings):
+                existing[folderId] = {
+                    (content["name"], content["md5Checksum"]): content["id"]
+                    for content in contents if content.get("md5Checksum")
+                }
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for content in files:
+            if content["id"] in ledger:
+                state["skipped"] += 1
+                continue
+
+            parent = destination[content["parent"]]
+            # Files without a checksum are never in existing, "" finds nothing
+            copied = existing.get(parent, {}).get((content["name"],
+                                                   content.get("md5Checksum", "")))
+            if copied is not None:
+                await record(content["id"], copied)
+                state["skipped"] += 1
+                continue
+
+            queue.put_nowait(content)
+        state["counter"] = state["skipped"]
+
+        async def worker() -> None:
+            while not queue.empty():
+                content = queue.get_nowait()
+                fileId = await self.copyFile(content["id"], destination[content["parent"]],
+                                             size=int(content.get("size", 0)))
+                await record(content["id"], fileId)
+                state["counter"] += 1
+
+        workers = [
+            self.bot.loop.create_task(worker())
+            for _ in range(min(self.copy_workers, queue.qsize()))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
 
     async def createFolder(self,
                            folderName: str,
@@ -243,66 +1140,205 @@ class GoogleDrive(plugin.Plugin):
         elif folderId is None and self.parent_id is not None:
             folder_metadata["parents"] = [self.parent_id]
 
-        folder = await util.run_sync(self.service.files().create(  # type: ignore
-            body=folder_metadata, fields="id", supportsAllDrives=True).execute)
+        folder = await self.batch(self.service.files().create(  # type: ignore
+            body=folder_metadata, fields="id", supportsAllDrives=True))
+        self.forget(folder_metadata.get("parents", [None])[0], folder["id"])
         return folder["id"]
 
+    async def findFolder(self, name: str,
+                         parent_id: Optional[str] = None) -> Optional[str]:
+        parent_id = parent_id or self.parent_id or "root"
+        name = name.replace("\\", "\\\\").replace("'", "\\'")
+        query = (f"name = '{name}' and '{parent_id}' in parents and "
+                 f"mimeType = '{FOLDER}' and trashed = false")
+        async for contents in self.searchContent(query=query, limit=1):
+            for content in contents:
+                return content["id"]
+
+        return None
+
+    async def listTree(self, folderId: str
+                       ) -> Dict[PurePosixPath, MutableMapping[str, Any]]:
+        """Lists everything under folderId by its path relative to it."""
+
+        tree: Dict[PurePosixPath, MutableMapping[str, Any]] = {}
+        lister = asyncio.Semaphore(self.copy_listers)
+
+        async def listFolder(path: PurePosixPath,
+                             parent: str) -> List[Tuple[PurePosixPath, str]]:
+            folders: List[Tuple[PurePosixPath, str]] = []
+            query = f"'{parent}' in parents and trashed = false"
+            async with lister:
+                async for contents in self.searchContent(query=query, limit=1000):
+                    for content in contents:
+                        tree[path / content["name"]] = content
+                        if content["mimeType"] == FOLDER:
+                            folders.append((path / content["name"], content["id"]))
+
+            return folders
+
+        level = [(PurePosixPath(), folderId)]
+        while level:
+            listings = await asyncio.gather(*(listFolder(path, parent)
+                                              for path, parent in level))
+            level = [folder for folders in listings for folder in folders]
+
+        return tree
+
     async def uploadFolder(
         self,
         sourceFolder: AsyncPath,
         *,
         gid: Optional[str] = None,
         parent_id: Optional[str] = None,
-        msg: Optional[pyrogram.types.Message] = None
-    ) -> AsyncIterator[asyncio.Task]:
-        async for content in sourceFolder.iterdir():
-            if await content.is_dir():
-                childFolder = await self.createFolder(content.name, parent_id)
-                async for task in self.uploadFolder(content,
-                                                    gid=gid,
-                                                    parent_id=childFolder,
-                                                    msg=msg):
-                    yield task
-            elif await content.is_file():
-                file = util.File(content)
-                content = await self.uploadFile(file, parent_id, msg)
-                if isinstance(content, str):  # Skip because file size is 0
-                    continue
+        state: Optional[MutableMapping[str, Any]] = None,
+        sync: bool = False
+    ) -> None:
+        """Uploads every file under sourceFolder with a bounded pool of workers.
+
+        Files are queued largest first so a big one never runs alone at the
+        end. Workers are named after gid so they can be cancelled through it,
+        state receives the file counter and the aggregate bytes uploaded.
+
+        With sync parent_id is taken to hold an earlier upload of sourceFolder,
+        only files missing there or differing in size or md5 are uploaded and
+        the outdated copies are deleted afterwards."""
+
+        remote: Dict[PurePosixPath, MutableMapping[str, Any]] = {}
+        if sync and parent_id is not None:
+            remote = await self.listTree(parent_id)
+
+        # Walk level by level so each level's folders are created in one batch
+        files: List[Tuple[int, AsyncPath, Optional[str]]] = []
+        level: List[Tuple[AsyncPath, Optional[str]]] = [(sourceFolder, parent_id)]
+        while level:
+            children: List[Tuple[AsyncPath, Optional[str]]] = []
+            for folder, folderId in level:
+                async for content in folder.iterdir():
+                    if await content.is_dir():
+                        children.append((content, folderId))
+                    elif await content.is_file():
+                        files.append(((await content.stat()).st_size, content, folderId))
+
+            async def create(child: AsyncPath, folderId: Optional[str]) -> str:
+                existing = remote.get(PurePosixPath(child.relative_to(sourceFolder)))
+                if existing is not None and existing["mimeType"] == FOLDER:
+                    return existing["id"]
+
+                return await self.createFolder(child.name, folderId)
+
+            folderIds = await asyncio.gather(*(create(child, folderId)
+                                               for child, folderId in children))
+            level = [(child, folderId)
+                     for (child, _), folderId in zip(children, folderIds)]
+
+        skipped = 0
+        outdated: List[str] = []
+        if remote:
+            changed: List[Tuple[int, AsyncPath, Optional[str]]] = []
+            candidates: List[Tuple[Tuple[int, AsyncPath, Optional[str]], str]] = []
+            for item in files:
+                existing = remote.get(PurePosixPath(item[1].relative_to(sourceFolder)))
+                if existing is None or existing["mimeType"] == FOLDER:
+                    changed.append(item)
+                elif int(existing.get("size", -1)) != item[0] or (
+                        not existing.get("md5Checksum")):
+                    changed.append(item)
+                    outdated.append(existing["id"])
+                else:
+                    candidates.append((item, existing["id"]))
+
+            # Only files whose size already matches are worth hashing
+            digests = await asyncio.gather(*(
+                util.run_sync(util.file.md5sum, str(item[1]), pool="cpu")
+                for item, _ in candidates))
+            for (item, fileId), digest in zip(candidates, digests):
+                existing = remote[PurePosixPath(item[1].relative_to(sourceFolder))]
+                if digest == existing["md5Checksum"]:
+                    skipped += 1
+                else:
+                    changed.append(item)
+                    outdated.append(fileId)
+
+            files = changed
+
+        files.sort(key=lambda item: item[0], reverse=True)
+        if state is None:
+            state = {}
+        state.update(counter=0, total=len(files), uploaded=0, skipped=skipped,
+                     size=sum(item[0] for item in files), start_time=util.time.sec())
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in files:
+            queue.put_nowait(item)
+
+        async def worker() -> None:
+            while not queue.empty():
+                size, path, folderId = queue.get_nowait()
+                content = await self.uploadFile(util.File(path), folderId)
+                if not isinstance(content, str):  # Empty files are done already
+                    sent = 0
+                    response = None
+                    while response is None:
+                        status, response = await content.next_chunk(num_retries=5)
+                        current = (status.resumable_progress
+                                   if status is not None else size)
+                        state["uploaded"] += current - sent  # type: ignore
+                        sent = current
+
+                state["counter"] += 1  # type: ignore
+
+        workers = [
+            self.bot.loop.create_task(worker(), name=gid)
+            for _ in range(min(self.upload_workers, len(files)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
 
-                yield self.bot.loop.create_task(file.progress(update=False),
-                                                name=gid)
-                await asyncio.sleep(0.5)
+        # Replaced only once every new version made it
+        await asyncio.gather(*(self.batch(self.service.files().delete(  # type: ignore
+            fileId=fileId, supportsAllDrives=True)) for fileId in outdated))
+        self.forget(*outdated)
 
     async def uploadFile(self,
                          file: Union[util.File, util.aria2.Download],
                          parent_id: Optional[str] = None,
                          msg: Optional[pyrogram.types.Message] = None
-                         ) -> Union[MediaFileUpload, str]:
-        body: MutableMapping[str, Any] = {"name": file.name, "mimeType": file.mime_type}
-        if parent_id is not None:
-            body["parents"] = [parent_id]
-        elif parent_id is None and self.parent_id is not None:
-            body["parents"] = [self.parent_id]
-
-        if (await file.path.stat()).st_size > 0:
-            media_body = MediaFileUpload(file.path,
-                                         mimetype=file.mime_type,
-                                         resumable=True,
-                                         chunksize=50 * 1024 * 1024)
-            content = await util.run_sync(self.service.files().create,  # type: ignore
-                                          body=body,
-                                          media_body=media_body,
-                                          fields="id, size, webContentLink",
-                                          supportsAllDrives=True)
-        else:
-            media_body = MediaFileUpload(file.path, mimetype=file.mime_type)
-            content = await util.run_sync(self.service.files().create(  # type: ignore
-                body=body,
-                media_body=media_body,
-                fields="id, size, webContentLink",
-                supportsAllDrives=True).execute)
-
-            return content.get("id")
+                         ) -> Union[ResumableUpload, str]:
+        size = (await file.path.stat()).st_size
+        if size == 0:
+            # Nothing to send, metadata alone creates the empty file
+            body: MutableMapping[str, Any] = {"name": file.name}
+            if file.mime_type is not None:
+                body["mimeType"] = file.mime_type
+            if parent_id is not None:
+                body["parents"] = [parent_id]
+            elif self.parent_id is not None:
+                body["parents"] = [self.parent_id]
+
+            async def create() -> str:
+                params = {"supportsAllDrives": "true", "fields": "id"}
+                headers = await self.authHeaders(self.pickAccount())
+                async with self.bot.http.post(self.files_url, params=params, json=body,
+                                              headers=headers) as resp:
+                    await self.raiseForStatus(resp)
+                    return (await resp.json())["id"]
+
+            fileId = await self.governor["metadata"].call(create)
+            self.forget(body.get("parents", [None])[0], fileId)
+            return fileId
+
+        account = self.pickAccount()
+        session = await self.createSession(file.name, file.mime_type, size, parent_id,
+                                           account=account)
+        content = ResumableUpload(self, file.path, session, size, account=account)
+        content.name, content.mime_type, content.parent_id = (file.name, file.mime_type,
+                                                              parent_id)
+        if msg is not None:
+            content.chat_id = msg.chat.id
 
         if isinstance(file, util.aria2.Download):
             content.gid, content.name, content.start_time = (file.gid, file.name,
@@ -314,8 +1350,273 @@ class GoogleDrive(plugin.Plugin):
             if self.index_link is not None:
                 file.index_link = self.index_link
 
+        await content.save()
         return content
 
+    def pickAccount(self) -> Optional[ServiceAccount]:
+        """Returns the service account with the most quota left today.
+
+        None means the pool is empty or spent and the owner credentials
+        should be used."""
+
+        account = max(self.accounts.values(), key=lambda a: a.remaining, default=None)
+        if account is None or account.remaining == 0:
+            return None
+
+        return account
+
+    async def saveAccount(self, account: ServiceAccount) -> None:
+        await self.writer.update_one({"_id": account.email},
+                                     {"$set": {"day": account.day, "used": account.used}})
+
+    async def chargeAccount(self, account: ServiceAccount, size: int) -> None:
+        account.rollover()
+        account.used += size
+        await self.saveAccount(account)
+
+    async def exhaustAccount(self, account: ServiceAccount) -> None:
+        self.log.warning(f"Daily quota of {account.email} is spent")
+        account.rollover()
+        account.used = max(account.used, account.quota)
+        await self.saveAccount(account)
+
+    async def accountService(self, account: ServiceAccount) -> Resource:
+        if account.service is None:
+            account.service = await util.run_sync(build, "drive", "v3",
+                                                  credentials=account.credentials,
+                                                  cache_discovery=False)
+
+        return account.service
+
+    async def authHeaders(self, account: Optional[ServiceAccount] = None
+                          ) -> MutableMapping[str, str]:
+        credentials = account.credentials if account is not None else self.credentials
+        if not credentials.valid:  # type: ignore
+            await util.run_sync(credentials.refresh, Request(),  # type: ignore
+                                pool="drive")
+
+        return {"Authorization": f"Bearer {credentials.token}"}  # type: ignore
+
+    async def createSession(self, name: str, mime_type: Optional[str], size: int,
+                            parent_id: Optional[str] = None, *,
+                            account: Optional[ServiceAccount] = None) -> str:
+        """Starts a Drive resumable upload and returns its session URI."""
+
+        body: MutableMapping[str, Any] = {"name": name}
+        if mime_type is not None:
+            body["mimeType"] = mime_type
+        if parent_id is not None:
+            body["parents"] = [parent_id]
+        elif self.parent_id is not None:
+            body["parents"] = [self.parent_id]
+
+        async def create() -> str:
+            headers = await self.authHeaders(account)
+            headers["X-Upload-Content-Length"] = str(size)
+            if mime_type is not None:
+                headers["X-Upload-Content-Type"] = mime_type
+            params = {"uploadType": "resumable", "supportsAllDrives": "true",
+                      "fields": "id, size, webContentLink"}
+            async with self.bot.http.post(self.upload_url, params=params, json=body,
+                                          headers=headers) as resp:
+                await self.raiseForStatus(resp)
+                return resp.headers["Location"]
+
+        return await self.governor["metadata"].call(create)
+
+    async def putChunk(
+        self,
+        session: str,
+        data: Union[bytes, memoryview],
+        offset: int,
+        size: int,
+        *,
+        progress: Optional[Callable[[int], None]] = None,
+        account: Optional[ServiceAccount] = None
+    ) -> Tuple[int, Optional[MutableMapping[str, Any]]]:
+        """Sends one chunk of a resumable upload.
+
+        Returns the number of bytes Drive has committed so far and the file
+        resource once the last byte was accepted. An empty chunk only asks
+        Drive for the committed offset."""
+
+        async def body() -> AsyncIterator[memoryview]:
+            view = memoryview(data)
+            for start in range(0, len(view), self.write_size):
+                piece = view[start:start + self.write_size]
+                yield piece
+                if progress is not None:
+                    progress(len(piece))
+
+        headers = await self.authHeaders(account)
+        headers["Content-Length"] = str(len(data))
+        if len(data):
+            headers["Content-Range"] = f"bytes {offset}-{offset + len(data) - 1}/{size}"
+        else:
+            headers["Content-Range"] = f"bytes */{size}"
+        # Drive answers 308 for "resume incomplete", it isn't a redirect
+        async with self.bot.http.put(session, data=body(), headers=headers,
+                                     allow_redirects=False) as resp:
+            if resp.status in {200, 201}:
+                return size, await resp.json()
+            if resp.status != 308:
+                await self.raiseForStatus(resp)
+                raise aiohttp.ClientResponseError(resp.request_info, resp.history,
+                                                  status=resp.status,
+                                                  message="Unexpected upload status")
+
+            committed = resp.headers.get("Range")
+            if committed is None:
+                return 0, None
+
+            return int(committed.rsplit("-", 1)[1]) + 1, None
+
+    async def sendChunk(
+        self,
+        session: str,
+        data: Union[bytes, memoryview],
+        offset: int,
+        size: int,
+        *,
+        account: Optional[ServiceAccount] = None,
+        retries: int = 5
+    ) -> Tuple[int, Optional[MutableMapping[str, Any]]]:
+        """putChunk through the media lane, retrying throttled and transient
+        failures.
+
+        Drive may have kept part of a failed chunk, so it is asked for the
+        committed offset before sending again. Whatever it kept is returned
+        as is and the caller sends the rest from there."""
+
+        lane = self.governor["media"]
+        attempt = 0
+        probe = False
+        while True:
+            try:
+                async with lane:
+                    if not probe:
+                        return await self.putChunk(session, data, offset, size,
+                                                   account=account)
+
+                    committed, response = await self.putChunk(session, b"", offset, size,
+                                                              account=account)
+                if response is not None or committed > offset:
+                    return committed, response
+
+                probe = False
+            except Exception as e:  # skipcq: PYL-W0703
+                if attempt >= retries or not lane.retryable(e):
+                    raise
+
+                attempt += 1
+                probe = True
+                await lane.backoff(attempt)
+
+    async def streamFile(self, ctx: command.Context, url: str, name: str, size: int,
+                         mime_type: Optional[str]) -> MutableMapping[str, Any]:
+        """Mirrors a remote file into Drive through memory only.
+
+        The source is read in resumable-upload sized chunks and at most two of
+        them wait in the queue, so memory stays bounded by a few chunks."""
+
+        account = self.pickAccount()
+        session = await self.createSession(name, mime_type, size, account=account)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+        async def produce() -> None:
+            offset = 0
+            attempt = 0
+            while offset < size:
+                headers = {"Range": f"bytes={offset}-"}
+                try:
+                    async with self.bot.http.get(url, headers=headers) as resp:
+                        resp.raise_for_status()
+                        if offset and resp.status != 206:
+                            raise aiohttp.ClientPayloadError("Source dropped range support")
+
+                        while offset < size:
+                            length = min(self.stream_chunk, size - offset)
+                            chunk = await resp.content.readexactly(length)
+                            await queue.put((offset, chunk))
+                            offset += length
+                            attempt = 0
+                except (aiohttp.ClientError, asyncio.IncompleteReadError,
+                        asyncio.TimeoutError) as e:
+                    attempt += 1
+                    if attempt > 5:
+                        raise
+                    self.log.warning(f"Source read failed at {offset}, resuming: {e}")
+                    await asyncio.sleep(2 ** attempt)
+
+        human = util.file.human_readable_bytes
+        time = util.time.format_duration_td
+        before = util.time.sec()
+        last_update_time = None
+
+        producer = self.bot.loop.create_task(produce())
+        try:
+            result = None
+            while result is None:
+                if producer.done() and queue.empty():
+                    producer.result()  # Raise the source error, if any
+                    # Everything went out, yet the last chunk got a 308
+                    _, result = await self.sendChunk(session, b"", size, size,
+                                                     account=account)
+                    if result is None:
+                        raise aiohttp.ClientPayloadError(
+                            f"Drive left the upload of '{name}' incomplete")
+                    break
+
+                if not queue.empty():
+                    # A finished producer would win every wait below
+                    offset, chunk = queue.get_nowait()
+                else:
+                    getter = self.bot.loop.create_task(queue.get())
+                    done, _ = await asyncio.wait({getter, producer},
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if getter not in done:
+                        getter.cancel()
+                        continue
+
+                    offset, chunk = getter.result()
+                view = memoryview(chunk)
+                sent = offset
+                while sent < offset + len(chunk) and result is None:
+                    committed, result = await self.sendChunk(
+                        session, view[sent - offset:], sent, size, account=account)
+                    if account is not None:
+                        await self.chargeAccount(account, max(committed - sent, 0))
+                    sent = max(committed, sent)
+
+                now = datetime.now()
+                if last_update_time is None or (now - last_update_time
+                                                ).total_seconds() >= 5:
+                    current = offset + len(chunk)
+                    percent = current / size
+                    try:
+                        speed = round(current / (util.time.sec() - before), 2)
+                        eta = timedelta(seconds=int(round((size - current) / speed)))
+                    except ZeroDivisionError:
+                        speed = 0
+                        eta = timedelta(seconds=0)
+                    bullets = "●" * int(round(percent * 10)) + "○"
+                    if len(bullets) > 10:
+                        bullets = bullets.replace("○", "")
+
+                    space = '    ' * (10 - len(bullets))
+                    await ctx.respond(
+                        f"`{name}`\n"
+                        f"Status: **Streaming**\n"
+                        f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
+                        f"__{human(current)} of {human(size)} @ "
+                        f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
+                    last_update_time = now
+        finally:
+            producer.cancel()
+
+        self.forget(self.parent_id, result.get("id"))
+        return result
+
     async def downloadFile(self, ctx: command.Context,
                            msg: pyrogram.types.Message) -> Optional[AsyncPath]:
         download_path = self.bot.config["download_path"]
@@ -387,20 +1688,28 @@ class GoogleDrive(plugin.Plugin):
 
     async def searchContent(self, query: str,
                             limit: int) -> AsyncIterator[List[MutableMapping[str, Any]]]:
-        fields = "nextPageToken, files(name, id, mimeType, webViewLink)"
+        fields = "nextPageToken, files(name, id, mimeType, size, md5Checksum, webViewLink)"
         pageToken = None
 
         while True:
-            response = await util.run_sync(self.service.files().list(  # type: ignore
-                supportsAllDrives=True,
-                includeItemsFromAllDrives=True,
-                q=query,
-                spaces="drive",
-                corpora="allDrives",
-                fields=fields,
-                pageSize=limit,
-                orderBy="folder, modifiedTime desc, name asc",
-                pageToken=pageToken).execute)
+            key = ("list", query, limit, pageToken)
+            response = self.metadata.get(key)
+            if response is None:
+                response = await self.execute(self.service.files().list(  # type: ignore
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    q=query,
+                    spaces="drive",
+                    corpora="allDrives",
+                    fields=fields,
+                    pageSize=limit,
+                    orderBy="folder, modifiedTime desc, name asc",
+                    pageToken=pageToken))
+                # Listing a folder goes stale with writes to it or to what it
+                # holds, anything else with any write.
+                tags = PARENTS.findall(query) or [SEARCH]
+                tags.extend(content["id"] for content in response.get("files", []))
+                self.metadata.put(key, response, tags=tags)
 
             yield response.get("files", [])
 
@@ -409,6 +1718,7 @@ class GoogleDrive(plugin.Plugin):
                 break
 
     @command.desc("Delete your GoogleDrive files/folders, warning this will skip trash")
+    @command.usage("[file/folder ids or links, separated by space]")
     @command.alias("gdrm")
     async def cmd_gdremove(self, ctx: command.Context, *,
                            identifier: Optional[str] = None
@@ -416,12 +1726,30 @@ class GoogleDrive(plugin.Plugin):
         if not ctx.input and not identifier:
             return "__Pass the id of content to delete it__"
         if ctx.input and not identifier:
-            identifier = getIdFromUrl(ctx.input)
-
-        await util.run_sync(self.service.files().delete(  # type: ignore
-                            fileId=identifier, supportsAllDrives=True).execute)
+            identifiers = [getIdFromUrl(item) for item in ctx.input.split()]
+        else:
+            identifiers = [identifier]
+
+        results = await asyncio.gather(*(
+            self.batch(self.service.files().delete(  # type: ignore
+                fileId=identifier, supportsAllDrives=True))
+            for identifier in identifiers), return_exceptions=True)
+        # Listings holding a deleted file are tagged with its id
+        self.forget(*identifiers)
+        if len(identifiers) == 1:
+            if isinstance(results[0], Exception):
+                raise results[0]
+
+            return f"__Deleted:__ `{identifiers[0]}`"
+
+        text = ""
+        for identifier, result in zip(identifiers, results):
+            if isinstance(result, Exception):
+                text += f"__Failed:__ `{identifier}`\n"
+            else:
+                text += f"__Deleted:__ `{identifier}`\n"
 
-        return f"__Deleted:__ `{identifier}`"
+        return text
 
     @command.desc("Copy public GoogleDrive folder/file into your own")
     @command.usage("[file id or folder id]")
@@ -434,9 +1762,9 @@ class GoogleDrive(plugin.Plugin):
 
         if ctx.msg.reply_to_message:
             reply_msg_id = ctx.msg.reply_to_message.message_id
-            for msg_id, identifier in self.copy_tasks.copy():
+            for msg_id, task in self.copy_tasks.copy():
                 if msg_id == reply_msg_id:
-                    await self.cmd_gdremove(ctx, identifier=identifier)
+                    task.cancel()
                     break
             else:
                 return "__Replied message is not task__"
@@ -449,7 +1777,7 @@ class GoogleDrive(plugin.Plugin):
             return "__Invalid id__"
 
         try:
-            content = await self.getInfo(identifier, ["id", "name", "mimeType"])
+            content = await self.getInfo(identifier, ["id", "name", "mimeType", "size"])
         except HttpError as e:
             if "'location': 'fileId'" in str(e):
                 return "__Invalid input of id.__"
@@ -457,62 +1785,54 @@ class GoogleDrive(plugin.Plugin):
             raise
 
         if content["mimeType"] == FOLDER:
-            cancelled = False
-            counter = 0
-            progress_string = ""
-            last_update_time = None
-            self.cache[ctx.msg.message_id] = 0
-
-            self.copy_tasks.add((ctx.msg.message_id, content["id"]))
-            parentFolder = await self.createFolder(content["name"])
-            async for task in self.copyFolder(target=content["id"],
-                                              parent_id=parentFolder,
-                                              name=content["name"],
-                                              msg_id=ctx.msg.message_id):
-                try:
-                    await task
-                except HttpError as e:
-                    if "'reason': 'notFound'" in str(e):
-                        cancelled = True
-                        break
+            state: MutableMapping[str, Any] = {"scanned": 0, "counter": 0, "total": 0}
+            parentFolder = await self.copyDestination(content, ctx.msg.chat.id)
+            task = self.bot.loop.create_task(
+                self.copyFolder(content["id"], parent_id=parentFolder, state=state))
+        else:
+            task = self.bot.loop.create_task(
+                self.copyFile(content["id"], size=int(content.get("size", 0))))
 
-                    raise
+        self.copy_tasks.add((ctx.msg.message_id, task))
+        self.tasks.add((ctx.response.message_id, task))
+        try:
+            while not task.done():
+                done, _ = await asyncio.wait({task}, timeout=5)
+                if done or content["mimeType"] != FOLDER:
+                    continue
+
+                if state["total"] == 0:
+                    progress_string = (f"__Scanning {content['name']}: "
+                                       f"{state['scanned']} items found__")
                 else:
-                    counter += 1
-                    now = datetime.now()
-                    length = self.cache[ctx.msg.message_id]
+                    counter, length = state["counter"], state["total"]
                     percent = round(((counter / length) * 100), 2)
                     progress_string = (f"__Copying {content['name']}"
                                        f": [{counter}/{length}] {percent}%__")
-                    if last_update_time is None or (now - last_update_time
-                                                    ).total_seconds() >= 5 and (
-                                                    progress_string != ""):
-                        await ctx.respond(progress_string)
-                        last_update_time = now
-
-            del self.cache[ctx.msg.message_id]
-            if cancelled:
-                self.copy_tasks.remove((ctx.msg.message_id, content["id"]))
+                await ctx.respond(progress_string)
+
+            result = task.result()
+        except asyncio.CancelledError:
+            task.cancel()
+            if self.bot.stopping:  # Leave the ledger for resumeCopies
+                raise
+
+            if content["mimeType"] == FOLDER:
+                await self.finishCopy(content["id"])
                 try:
                     await self.cmd_gdremove(ctx, identifier=parentFolder)
                 except Exception:  # skipcq: PYL-W0703
                     return "__Aborted, but failed to delete the content__"
 
-                return "__Transmission aborted__"
+            return "__Transmission aborted__"
+        finally:
+            self.copy_tasks.remove((ctx.msg.message_id, task))
+            self.tasks.remove((ctx.response.message_id, task))
 
-            ret = await self.getInfo(parentFolder, ["webViewLink"])
-        else:
-            task = self.bot.loop.create_task(self.copyFile(content["id"]))
-            self.copy_tasks.add((ctx.msg.message_id, content["id"]))
-            try:
-                await task
-            except asyncio.CancelledError:
-                return "__Transmission aborted__"
-
-            file_id = task.result()
-            ret = await self.getInfo(file_id, ["webViewLink"])
-
-        self.copy_tasks.remove((ctx.msg.message_id, content["id"]))
+        if content["mimeType"] == FOLDER:
+            await self.finishCopy(content["id"])
+        ret = await self.getInfo(parentFolder if content["mimeType"] == FOLDER
+                                 else result, ["webViewLink"])
 
         return f"Copying success: [{content['name']}]({ret['webViewLink']})"
 
@@ -603,6 +1923,137 @@ class GoogleDrive(plugin.Plugin):
         except NameError:
             return "__Mirroring torrent file/url needs Aria2 loaded.__"
 
+    @command.desc("Add a service account key to the upload pool")
+    @command.usage("[key json or reply to the key file]")
+    async def cmd_gdsaadd(self, ctx: command.Context) -> Optional[str]:
+        if ctx.msg.reply_to_message and ctx.msg.reply_to_message.document:
+            path = await self.downloadFile(ctx, ctx.msg.reply_to_message)
+            if path is None:
+                return "__Failed to download the key.__"
+
+            text = await path.read_text()
+            await path.unlink()
+        elif ctx.input:
+            text = ctx.input
+        else:
+            return "__Pass the key or reply to the key file.__"
+
+        try:
+            key = json.loads(text)
+            account = ServiceAccount(key)
+        except (KeyError, TypeError, ValueError):
+            return "__That is not a service account key.__"
+
+        await self.db.update_one({"_id": account.email},
+                                 {"$set": {"service_account": key}}, upsert=True)
+        self.accounts[account.email] = account
+
+        await ctx.respond(f"__Added__ `{account.email}` "
+                          f"__to the pool of {len(self.accounts)}.__")
+        if ctx.input:
+            await ctx.msg.delete()  # Don't leave the private key lying around
+
+        return None
+
+    @command.desc("Remove a service account from the upload pool")
+    @command.usage("[service account email]")
+    async def cmd_gdsarm(self, ctx: command.Context) -> Optional[str]:
+        if ctx.input not in self.accounts:
+            return "__No such service account in the pool.__"
+
+        del self.accounts[ctx.input]
+        await self.db.delete_one({"_id": ctx.input})
+
+        return f"__Removed__ `{ctx.input}`"
+
+    @command.desc("List the service accounts and their quota left today")
+    async def cmd_gdsalist(self, ctx: command.Context) -> str:
+        if not self.accounts:
+            return "__The pool is empty, uploads use the owner credentials.__"
+
+        human = util.file.human_readable_bytes
+        text = "**Service accounts**\n\n"
+        for account in sorted(self.accounts.values(), key=lambda a: a.remaining,
+                              reverse=True):
+            text += (f"`{account.email}`\n"
+                     f"__{human(account.used)} used, {human(account.remaining)} left__\n")
+
+        return text
+
+    @command.desc("Show the chunk sizes recent uploads settled on, API and cache usage")
+    async def cmd_gdstats(self, ctx: command.Context) -> str:
+        human = util.file.human_readable_bytes
+        text = "**Recent uploads**\n\n"
+        if not self.upload_stats:
+            text += "__No upload finished yet.__\n\n"
+        for stats in reversed(self.upload_stats):
+            text += (f"`{stats['name']}` (__{human(stats['size'])}__)\n"
+                     f"Chunk: **{human(stats['chunksize'])}** over "
+                     f"{len(stats['sizes'])} chunks\n")
+            if stats["throughput"] is not None:
+                text += (f"__{human(stats['throughput'], postfix='/s')}, "
+                         f"latency {stats['latency']:.2f}s__\n")
+            text += "\n"
+
+        for lane in self.governor.lanes.values():
+            stats = lane.stats
+            text += (f"__{stats['name']}: {stats['active']}/{stats['limit']} in flight, "
+                     f"{stats['throttled']} of {stats['calls']} calls throttled__\n")
+
+        stats = self.metadata.stats
+        text += (f"__metadata cache: {stats['size']}/{stats['maxsize']} entries, "
+                 f"{stats['hits']} hits, {stats['misses']} misses__\n")
+
+        return text
+
+    @command.desc("Mirror a direct link into GoogleDrive without saving it on disk")
+    @command.usage("[direct link]")
+    async def cmd_gdstream(self, ctx: command.Context) -> Optional[str]:
+        if not ctx.input:
+            return "__Pass the direct link to stream.__"
+
+        url = ctx.input
+        match = DOMAIN.match(url)
+        if match:
+            direct = await self.getDirectLink(match.group(1), url)
+            if isinstance(direct, list) and direct:
+                url = direct[0]["url"]
+            elif isinstance(direct, str):
+                url = direct
+
+        await ctx.respond("Preparing...")
+        async with self.bot.http.get(url, headers={"Range": "bytes=0-0"}) as resp:
+            if resp.status != 206 or "Content-Range" not in resp.headers:
+                return "__Source doesn't support ranged requests, use gdmirror instead.__"
+
+            size = resp.headers["Content-Range"].rsplit("/", 1)[1]
+            if not size.isdigit():
+                return "__Source doesn't report its size, use gdmirror instead.__"
+
+            name = resp.content_disposition.filename if (
+                resp.content_disposition and resp.content_disposition.filename
+            ) else parse.unquote(resp.url.name) or "unnamed"
+            mime_type = resp.content_type
+
+        task = self.bot.loop.create_task(
+            self.streamFile(ctx, url, name, int(size), mime_type))
+        self.tasks.add((ctx.response.message_id, task))
+        try:
+            await task
+        except asyncio.CancelledError:
+            return "__Transmission aborted.__"
+        finally:
+            self.tasks.remove((ctx.response.message_id, task))
+
+        content = task.result()
+        text = (f"**GoogleDrive Link**: [{name}]({content.get('webContentLink')}) "
+                f"(__{util.file.human_readable_bytes(int(content.get('size', size)))}__)")
+        if self.index_link is not None:
+            text += (f"\n\n__Shareable link__: "
+                     f"[Here]({join(self.index_link, parse.quote(name))}).")
+
+        return text
+
     @command.usage("[parent=\"folderId\"] [name=\"file/folder name\"] "
                    "[limit=number] [filter=file/folder]"
                    "[q=\"search query\"], **single/double quote important for "
@@ -681,26 +2132,41 @@ class GoogleDrive(plugin.Plugin):
         output = ""
         count = 0
 
-        try:
-            async for contents in self.searchContent(query=query, limit=limit):
-                for content in contents:
-                    if count >= limit:
-                        break
+        if self.indexed and "q" not in options:
+            if filters is not None:
+                folder: Optional[bool] = options["filter"] == "folder"
+            else:
+                folder = None
 
-                    count += 1
-                    output += (
-                        MIME_TYPE.get(content["mimeType"], "📄") +
-                        f" [{content['name']}]({content['webViewLink']})\n")
+            results = await self.searchIndex(name=name, parent=parent, folder=folder,
+                                             limit=limit)
+            for content in results:
+                count += 1
+                output += (MIME_TYPE.get(content["mimeType"], "📄") +
+                           f" [{content['name']}]({content['webViewLink']})\n")
 
-                if count >= limit:
-                    break
-        except HttpError as e:
-            if "'location': 'q'" in str(e):
-                return "__Invalid parameters of query.__"
-            if "'location': 'fileId'" in str(e):
-                return "__Invalid parameters of parent.__"
+        # Ask the API only when the index has nothing or can't take the query
+        if count == 0:
+            try:
+                async for contents in self.searchContent(query=query, limit=limit):
+                    for content in contents:
+                        if count >= limit:
+                            break
 
-            raise
+                        count += 1
+                        output += (
+                            MIME_TYPE.get(content["mimeType"], "📄") +
+                            f" [{content['name']}]({content['webViewLink']})\n")
+
+                    if count >= limit:
+                        break
+            except HttpError as e:
+                if "'location': 'q'" in str(e):
+                    return "__Invalid parameters of query.__"
+                if "'location': 'fileId'" in str(e):
+                    return "__Invalid parameters of parent.__"
+
+                raise
 
         if query == "":
             query = "Not specified"
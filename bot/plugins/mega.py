@@ -1,27 +1,211 @@
+import asyncio
 import json
+import os
 import random
 import re
-from typing import TYPE_CHECKING, Any, ClassVar, MutableMapping, Optional
+from datetime import timedelta
+from functools import partial
+from typing import TYPE_CHECKING, Any, ClassVar, List, MutableMapping, Optional, Tuple
 
+import aiohttp
 from aiopath import AsyncPath
 from Crypto.Cipher import AES
 from Crypto.Util import Counter
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
-from .. import command, plugin
+from .. import command, plugin, util
 from ..util import crypto
 
 if TYPE_CHECKING:
     from .aria2 import Aria2
+    from .gdrive import GoogleDrive
 
 
 class Mega(plugin.Plugin):
     name: ClassVar[str] = "Mega"
+    # Bytes of ciphertext handed to a worker at once, also the progress step
+    decrypt_range: ClassVar[int] = 64 * 1024 * 1024
+    # Plaintext bytes of MAC chunks handed to a verify worker at once
+    verify_range: ClassVar[int] = 64 * 1024 * 1024
+    # Parallel ranged requests used by the streaming download
+    stream_connections: ClassVar[int] = 8
+    stream_segment: ClassVar[int] = 16 * 1024 * 1024
+    stream_buffer: ClassVar[int] = 4 * 1024 * 1024
 
     file: MutableMapping[str, MutableMapping[str, Any]]
 
     async def on_load(self) -> None:
         self.file = {}
 
+    async def verify(self, path: AsyncPath, key: bytes, mac_iv: bytes,
+                     meta_mac: Tuple[int, int]) -> bool:
+        """Checks a decrypted file against the meta-MAC embedded in its key."""
+
+        size = (await path.stat()).st_size
+        if size == 0:
+            return True
+
+        batches: List[List[Tuple[int, int]]] = [[]]
+        batch_size = 0
+        for chunk in crypto.get_chunks(size):
+            if batch_size >= self.verify_range:
+                batches.append([])
+                batch_size = 0
+            batches[-1].append(chunk)
+            batch_size += chunk[1]
+
+        worker = partial(crypto.mega_chunk_macs, str(path), key, mac_iv)
+        results = await asyncio.gather(*[
+            util.run_sync(worker, batch, pool="cpu")
+            for batch in batches])
+
+        macs = [mac for result in results for mac in result]
+        return await util.run_sync(crypto.mega_meta_mac, macs, key) == tuple(meta_mac)
+
+    async def decrypt(self, gid: str, source: AsyncPath) -> AsyncPath:
+        """Decrypts a finished download into its output file using every core."""
+
+        info = self.file[gid]
+        output: AsyncPath = info["file"]
+        size = (await source.stat()).st_size
+
+        def allocate() -> None:
+            fd = os.open(output, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.ftruncate(fd, size)
+            finally:
+                os.close(fd)
+
+        await util.run_sync(allocate)
+
+        info["decrypted"] = 0
+        worker = partial(crypto.aes_ctr_decrypt_range, str(source), str(output),
+                         info["key"], info["iv"])
+        ranges = [util.run_sync(worker, offset, min(self.decrypt_range, size - offset),
+                                pool="cpu")
+                  for offset in range(0, size, self.decrypt_range)]
+        for done in asyncio.as_completed(ranges):
+            info["decrypted"] += await done
+
+        def sync() -> None:
+            fd = os.open(output, os.O_WRONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        await util.run_sync(sync)
+        return output
+
+    @staticmethod
+    def _writeSegment(fd: int, aes: Any, buffer: bytearray, offset: int) -> None:
+        aes.decrypt(buffer, output=buffer)
+        os.pwrite(fd, buffer, offset)
+
+    @retry(wait=wait_random_exponential(multiplier=2, min=3, max=12),
+           stop=stop_after_attempt(5),
+           retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)))
+    async def _fetchSegment(self, url: str, fd: int, key: bytes, initial_value: int,
+                            offset: int, length: int, progress: List[int]) -> None:
+        counter = Counter.new(128, initial_value=initial_value + offset // AES.block_size)
+        aes = AES.new(key, AES.MODE_CTR, counter=counter)
+
+        # Rewind progress if this is a retry of a partially fetched segment
+        done = 0
+        try:
+            headers = {"Range": f"bytes={offset}-{offset + length - 1}"}
+            async with self.bot.http.get(url, headers=headers) as resp:
+                resp.raise_for_status()
+                if resp.status != 206:
+                    raise aiohttp.ClientPayloadError("Range request is not honored")
+
+                buffer = bytearray()
+                async for chunk in resp.content.iter_chunked(1024 * 1024):
+                    buffer.extend(chunk)
+                    if len(buffer) >= self.stream_buffer:
+                        await util.run_sync(self._writeSegment, fd, aes, buffer,
+                                            offset + done)
+                        done += len(buffer)
+                        progress[0] += len(buffer)
+                        buffer = bytearray()
+
+                if buffer:
+                    await util.run_sync(self._writeSegment, fd, aes, buffer,
+                                        offset + done)
+                    done += len(buffer)
+                    progress[0] += len(buffer)
+
+            if done != length:
+                raise aiohttp.ClientPayloadError(
+                    f"Segment at {offset} ended after {done} of {length} bytes")
+        except BaseException:
+            progress[0] -= done
+            raise
+
+    async def stream(self, ctx: command.Context, url: str, output: AsyncPath, size: int,
+                     key: bytes, initial_value: int) -> None:
+        """Downloads a Mega file with ranged requests, decrypting as it arrives.
+
+        Every segment starts its own CTR counter at its offset, so plaintext is
+        written straight into place and no ciphertext ever touches the disk."""
+
+        fd = await util.run_sync(os.open, output, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                                 0o644)
+        try:
+            await util.run_sync(os.ftruncate, fd, size)
+
+            segments: List[Tuple[int, int]] = [
+                (offset, min(self.stream_segment, size - offset))
+                for offset in range(0, size, self.stream_segment)]
+            segments.reverse()
+            progress = [0]
+
+            async def worker() -> None:
+                while segments:
+                    offset, length = segments.pop()
+                    await self._fetchSegment(url, fd, key, initial_value, offset,
+                                             length, progress)
+
+            async def report() -> None:
+                human = util.file.human_readable_bytes
+                time = util.time.format_duration_td
+                before = util.time.sec()
+                while True:
+                    await asyncio.sleep(5)
+                    current = progress[0]
+                    percent = current / size
+                    try:
+                        speed = round(current / (util.time.sec() - before), 2)
+                        eta = timedelta(seconds=int(round((size - current) / speed)))
+                    except ZeroDivisionError:
+                        speed = 0
+                        eta = timedelta(seconds=0)
+                    bullets = "●" * int(round(percent * 10)) + "○"
+                    if len(bullets) > 10:
+                        bullets = bullets.replace("○", "")
+
+                    space = '    ' * (10 - len(bullets))
+                    await ctx.respond(
+                        f"`{output.name}`\n"
+                        f"Status: **Downloading**\n"
+                        f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
+                        f"__{human(current)} of {human(size)} @ "
+                        f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
+
+            reporter = self.bot.loop.create_task(report())
+            workers = [self.bot.loop.create_task(worker())
+                       for _ in range(min(self.stream_connections, len(segments)))]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                reporter.cancel()
+
+            await util.run_sync(os.fsync, fd)
+        finally:
+            await util.run_sync(os.close, fd)
+
     async def api_request(self, file_id: str) -> MutableMapping[str, Any]:
         """Make request to mega.nz API"""
         uid = random.randint(0, 0xFFFFFFFF)
@@ -67,13 +251,19 @@ class Mega(plugin.Plugin):
         file = await self.api_request(file_id)
         if not isinstance(file, (MutableMapping, dict)):
             return "__The file you are trying to download is no longer available.__"
-        att = crypto.base64_url_decode(file["at"])
-        att = crypto.decrypt_attr(att, k)
+        att = crypto.decrypt_attr(crypto.base64_url_decode(file["at"]), k)
 
         kStr = crypto.a32_to_str(k)
-        counter = Counter.new(128, initial_value=((iv[0] << 32) + iv[1]) << 64)
-        aes = AES.new(kStr, AES.MODE_CTR, counter=counter)
+        initial_value = ((iv[0] << 32) + iv[1]) << 64
+        mac_iv = crypto.a32_to_str((iv[0], iv[1], iv[0], iv[1]))
+        meta_mac = key[6:8]
+
+        size = file.get("s")
+        if size is not None:
+            return await self.mirror(ctx, file["g"], att["n"], int(size), kStr,
+                                     initial_value, mac_iv, meta_mac)
 
+        # Size unknown, fall back to aria2 and decrypt after the download
         outputFile: AsyncPath = self.bot.config["download_path"] / (att["n"] + ".temp")
 
         aria2: "Aria2" = self.bot.plugins["Aria2"]  # type: ignore
@@ -82,4 +272,50 @@ class Mega(plugin.Plugin):
         if not gid:
             return "Invalid response"
 
-        self.file[gid] = {"file": outputFile, "aes": aes}
+        self.file[gid] = {"file": outputFile, "key": kStr, "iv": initial_value,
+                          "mac_iv": mac_iv, "meta_mac": meta_mac, "decrypted": 0}
+
+    async def mirror(self, ctx: command.Context, url: str, name: str, size: int,
+                     key: bytes, initial_value: int, mac_iv: bytes,
+                     meta_mac: Tuple[int, int]) -> Optional[str]:
+        drive: "GoogleDrive" = self.bot.plugins["GoogleDrive"]  # type: ignore
+        outputFile: AsyncPath = self.bot.config["download_path"] / name
+
+        await ctx.respond("Preparing...")
+        await self.bot.config["download_path"].mkdir(parents=True, exist_ok=True)
+
+        task = self.bot.loop.create_task(
+            self.stream(ctx, url, outputFile, size, key, initial_value))
+        drive.tasks.add((ctx.response.message_id, task))
+        try:
+            await task
+        except asyncio.CancelledError:
+            await outputFile.unlink(missing_ok=True)
+            return "__Transmission aborted.__"
+        except BaseException:
+            # Don't leave the preallocated file behind
+            await outputFile.unlink(missing_ok=True)
+            raise
+        finally:
+            drive.tasks.remove((ctx.response.message_id, task))
+
+        await ctx.respond(f"`{name}`\nStatus: **Verifying**")
+        if not await self.verify(outputFile, key, mac_iv, meta_mac):
+            await outputFile.unlink(missing_ok=True)
+            return f"__MAC mismatch, download of__ `{name}` __is corrupted.__"
+
+        file = util.File(outputFile)
+        content = await drive.uploadFile(file, msg=ctx.response)
+        if isinstance(content, str):
+            return f"__Uploaded empty file__ `{name}`"
+
+        task = self.bot.loop.create_task(file.progress())
+        drive.tasks.add((ctx.response.message_id, task))
+        try:
+            await task
+        except asyncio.CancelledError:
+            return "__Transmission aborted.__"
+        finally:
+            drive.tasks.remove((ctx.response.message_id, task))
+
+        return None
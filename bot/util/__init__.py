@@ -1,4 +1,5 @@
-from . import aria2, async_helper, config, crypto, db, error, file, misc, tg, text, time
+from . import (aria2, async_helper, batch, cache, config, crypto, db, error, file, governor,
+               misc, tg, text, time)
 
 File = file.File
 run_sync = async_helper.run_sync
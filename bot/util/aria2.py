@@ -1,15 +1,25 @@
 import json
 import re
 import socket
+from array import array
 from datetime import datetime, timedelta
+from itertools import accumulate
 from mimetypes import guess_type
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 import aiohttp
 from aioaria2 import Aria2WebsocketTrigger
 from aiopath import AsyncPath
 from bs4 import BeautifulSoup
 
+# Fields the progress renderer reads on every tick, "files" and "bittorrent"
+# are only requested until we've seen them once since both can be huge.
+PROGRESS_KEYS = [
+    "gid", "status", "totalLength", "completedLength", "downloadSpeed",
+    "connections", "numSeeders", "seeder", "dir", "followedBy", "infoHash",
+    "errorCode", "errorMessage"
+]
+
 
 def get_free_port():
     sock = socket.socket()
@@ -19,8 +29,17 @@ def get_free_port():
     return port
 
 
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
 class BitTorrent:
 
+    __slots__ = ("_data",)
+
     def __init__(self, data: Dict[str, Any]) -> None:
         self._data = data or {}
 
@@ -49,64 +68,111 @@ class BitTorrent:
 
 
 class File:
+    """A single entry of a download's file list.
 
-    def __init__(self, data: Dict[str, Any]) -> None:
-        self._data = data or {}
+    Sizes live in the owning :obj:`Download` arrays, so a refresh with an
+    unchanged file list only rewrites numbers instead of rebuilding objects."""
+
+    __slots__ = ("_download", "_pos", "_path", "_async_path", "index", "selected", "uris")
+
+    _download: "Download"
+    _pos: int
+    _path: str
+    _async_path: Optional[AsyncPath]
+
+    index: int
+    selected: bool
+    uris: Optional[List[Dict[str, Any]]]
+
+    def __init__(self, download: "Download", pos: int, data: Dict[str, Any]) -> None:
+        self._download = download
+        self._pos = pos
+        self._path = data["path"]
+        self._async_path = None
+
+        self.index = int(data["index"])
+        self.selected = data.get("selected") == "true"
+        self.uris = data.get("uris")
 
     def __str__(self):
-        return str(self.path)
+        return self._path
 
     def __eq__(self, other):
-        return self.path == other.path
-
-    @property
-    def index(self) -> int:
-        return int(self._data["index"])
+        return self._path == other._path
 
     @property
     def path(self) -> AsyncPath:
-        return AsyncPath(self._data["path"])
+        if self._async_path is None:
+            self._async_path = AsyncPath(self._path)
+
+        return self._async_path
 
     @property
     def mime_type(self) -> Optional[str]:
-        return guess_type(self.path)[0]
+        return guess_type(self._path)[0]
 
     @property
     def metadata(self) -> bool:
-        return str(self.path).startswith("[METADATA]")
+        return self._path.startswith("[METADATA]")
 
     @property
     def length(self) -> int:
-        return int(self._data["length"])
+        return self._download._lengths[self._pos]  # skipcq: PYL-W0212
 
     @property
     def completed_length(self) -> int:
-        return int(self._data["completedLength"])
+        return self._download._completed[self._pos]  # skipcq: PYL-W0212
 
-    @property
-    def selected(self) -> bool:
-        return self._data.get("selected") == "true"
 
-    @property
-    def uris(self) -> Optional[List[Dict[str, Any]]]:
-        return self._data.get("uris")
+class Download:
+    """Parsed aria2 tellStatus response.
 
+    Every field is converted once per update instead of on each property
+    access, the raw "files" and "bittorrent" arrays aren't kept around."""
 
-class Download:
+    __slots__ = (
+        "client", "_data", "_bittorrent", "_completed", "_completed_length",
+        "_connections", "_dir", "_download_speed", "_error_code", "_files",
+        "_lengths", "_name", "_num_seeders", "_offsets", "_pieces", "_total_length",
+        "watch_pieces"
+    )
 
     _bittorrent: Optional[BitTorrent]
+    _completed: array
+    _completed_length: int
+    _connections: int
+    _data: Dict[str, Any]
+    _dir: Optional[AsyncPath]
+    _download_speed: int
+    _error_code: Optional[int]
     _files: List[File]
+    _lengths: array
     _name: str
+    _num_seeders: Optional[int]
+    _offsets: array
+    _pieces: Optional[int]
+    _total_length: int
+
+    # Keep fetching the piece bitfield on every refresh
+    watch_pieces: bool
 
     def __init__(
         self, client: Aria2WebsocketTrigger, data: Dict[str, Any]
     ) -> None:
         self.client = client
-        self._data = data or {}
+        self._data = {}
+        self.watch_pieces = False
 
         self._name = ""
-        self._files: List[File] = []
+        self._files = []
+        self._lengths = array("q")
+        self._offsets = array("q")
+        self._pieces = None
+        self._completed = array("q")
         self._bittorrent = None
+        self._dir = None
+
+        self._load(data or {})
 
     def __str__(self):
         return self.name
@@ -114,22 +180,95 @@ class Download:
     def __eq__(self, other):
         return self.gid == other.gid
 
-    async def update(self) -> "Download":
-        self._data = await self.client.tellStatus(self.gid)
+    def _load(self, data: Dict[str, Any]) -> None:
+        files = data.pop("files", None)
+        bittorrent = data.pop("bittorrent", None)
+        bitfield = data.get("bitfield")
+
+        if "dir" in data and data["dir"] != self._data.get("dir"):
+            self._dir = None
+        self._data.update(data)
+
+        data = self._data
+        self._total_length = _int(data.get("totalLength")) or 0
+        self._completed_length = _int(data.get("completedLength")) or 0
+        self._download_speed = _int(data.get("downloadSpeed")) or 0
+        self._connections = _int(data.get("connections")) or 0
+        self._num_seeders = _int(data.get("numSeeders"))
+        self._error_code = _int(data.get("errorCode"))
+        if bitfield is not None:
+            self._pieces = int(bitfield or "0", 16)
+
+        if files is not None:
+            self._loadFiles(files)
+        if bittorrent is not None:
+            self._bittorrent = BitTorrent(bittorrent)
+            self._name = ""
+
+    def _loadFiles(self, files: List[Dict[str, Any]]) -> None:
+        current = self._files
+        # A gid keeps its file list once aria2 resolved it, so only the
+        # numbers need a refresh as long as the paths match. Lengths are among
+        # them, magnets and HTTP downloads learn sizes after the paths.
+        if len(current) == len(files) and current and (
+                current[0]._path == files[0]["path"] and  # skipcq: PYL-W0212
+                current[-1]._path == files[-1]["path"]):  # skipcq: PYL-W0212
+            self._setLengths(files)
+            for file, data in zip(current, files):
+                file.selected = data.get("selected") == "true"
+
+            return
 
+        self._setLengths(files)
+        self._files = [File(self, pos, data) for pos, data in enumerate(files)]
         self._name = ""
-        self._files = []
-        self._bittorrent = None
 
+    def _setLengths(self, files: List[Dict[str, Any]]) -> None:
+        self._completed = array("q", [int(data["completedLength"]) for data in files])
+        lengths = array("q", [int(data["length"]) for data in files])
+        if lengths != self._lengths:
+            self._lengths = lengths
+            # Torrent files are laid out back to back in index order
+            self._offsets = array("q", accumulate(lengths, initial=0))
+
+    async def update(self, keys: Optional[List[str]] = None) -> "Download":
+        data = await self.client.tellStatus(self.gid, keys)
+        if keys is None:
+            # Full status, anything not present anymore must be dropped
+            self._data = {}
+            self._bittorrent = None
+            self._pieces = None
+            self._name = ""
+
+        return self.merge(data)
+
+    def merge(self, data: Dict[str, Any]) -> "Download":
+        """Merges a partial tellStatus response into the cached status."""
+
+        self._load(data)
         return self
 
+    @property
+    def progress_keys(self) -> List[str]:
+        keys = PROGRESS_KEYS.copy()
+        if not self._files or not self._files[0]._path:  # skipcq: PYL-W0212
+            keys.append("files")
+        if self.watch_pieces:
+            keys.append("bitfield")
+            if "pieceLength" not in self._data:
+                keys.append("pieceLength")
+        if self._bittorrent is None:
+            keys.append("bittorrent")
+
+        return keys
+
     @property
     def name(self) -> str:
         if not self._name:
             if self.bittorrent and self.bittorrent.info:
                 self._name = self.bittorrent.info["name"]
             elif self.files[0].metadata:
-                self._name = str(self.files[0].path)
+                self._name = str(self.files[0])
             else:
                 file_path = str(self.files[0].path.absolute())
                 dir_path = str(self.dir.absolute())
@@ -177,15 +316,15 @@ class Download:
 
     @property
     def total_length(self) -> int:
-        return int(self._data["totalLength"])
+        return self._total_length
 
     @property
-    def completed_length(self) -> float:
-        return float(self._data["completedLength"])
+    def completed_length(self) -> int:
+        return self._completed_length
 
     @property
     def download_speed(self) -> int:
-        return int(self._data["downloadSpeed"])
+        return self._download_speed
 
     @property
     def info_hash(self) -> Optional[str]:
@@ -193,10 +332,7 @@ class Download:
 
     @property
     def num_seeders(self) -> Optional[int]:
-        try:
-            return int(self._data["numSeeders"])
-        except ValueError:
-            return None
+        return self._num_seeders
 
     @property
     def seeder(self) -> bool:
@@ -204,14 +340,11 @@ class Download:
 
     @property
     def connections(self) -> int:
-        return int(self._data["connections"])
+        return self._connections
 
     @property
     def error_code(self) -> Optional[int]:
-        try:
-            return int(self._data["errorCode"])
-        except ValueError:
-            return None
+        return self._error_code
 
     @property
     def error_message(self) -> Optional[str]:
@@ -219,7 +352,10 @@ class Download:
 
     @property
     def dir(self) -> AsyncPath:
-        return AsyncPath(self._data["dir"])
+        if self._dir is None:
+            self._dir = AsyncPath(self._data["dir"])
+
+        return self._dir
 
     async def is_file(self) -> bool:
         return await (self.dir / self.name).is_file()
@@ -237,17 +373,41 @@ class Download:
 
     @property
     def files(self) -> List[File]:
-        if not self._files:
-            self._files = [File(data) for data in self._data.get("files", [])]
-
         return self._files
 
     @property
     def bittorrent(self) -> Optional[BitTorrent]:
-        if not self._bittorrent and "bittorrent" in self._data:
-            self._bittorrent = BitTorrent(self._data["bittorrent"])
         return self._bittorrent
 
+    @property
+    def piece_length(self) -> int:
+        return _int(self._data.get("pieceLength")) or 0
+
+    def verified(self, file: File) -> bool:
+        """Whether every piece file overlaps passed the hash check.
+
+        aria2 writes a piece out before checking it, so those bytes are on
+        disk as well. Files are preallocated, their size on disk says nothing."""
+
+        piece = self.piece_length
+        if self._pieces is None or not piece:
+            return False
+
+        length = file.length
+        if length == 0:
+            return True
+
+        offset = self._offsets[file._pos]  # skipcq: PYL-W0212
+        first, last = offset // piece, (offset + length - 1) // piece
+        # The highest bit of the bitfield is piece 0
+        bits = len(self._data["bitfield"]) * 4
+        if last >= bits:
+            return False
+
+        span = last - first + 1
+        mask = (1 << span) - 1
+        return (self._pieces >> (bits - 1 - last)) & mask == mask
+
     @property
     def metadata(self) -> bool:
         return bool(self.followed_by)
@@ -279,6 +439,30 @@ class Download:
             return timedelta.max
 
 
+async def update_all(client: Aria2WebsocketTrigger,
+                     downloads: Iterable[Download]) -> List[Download]:
+    """Refreshes the given downloads in a single system.multicall round-trip.
+
+    Downloads whose gid no longer exists on aria2 are left out of the result."""
+
+    downloads = list(downloads)
+    if not downloads:
+        return []
+
+    methods = [{"methodName": "aria2.tellStatus",
+                "params": [download.gid, download.progress_keys]}
+               for download in downloads]
+    results = await client.multicall(methods)
+
+    updated = []
+    for download, result in zip(downloads, results):
+        # Successful calls are wrapped in a single-item list, faults are dicts
+        if isinstance(result, list) and result:
+            updated.append(download.merge(result[0]))
+
+    return updated
+
+
 class DirectLinks:
 
     http: aiohttp.ClientSession
@@ -1,12 +1,130 @@
 import asyncio
 import functools
-from typing import Any, Callable, TypeVar
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, MutableMapping, Optional, Tuple, TypeVar
 
 Result = TypeVar("Result")
 
+# Work that shouldn't queue behind each other gets its own pool, a process
+# pool for CPU bound work as threads would only fight over the GIL.
+PROCESS_POOLS = {"cpu"}
+SIZES: Dict[str, int] = {"cpu": os.cpu_count() or 1, "db": 8, "drive": 16}
 
-async def run_sync(func: Callable[..., Result], *args: Any, **kwargs: Any) -> Result:
-    """Runs the given sync function (optionally with arguments) on a separate thread."""
+
+def _timed(func: Callable[..., Result], submitted: float, *args: Any,
+           **kwargs: Any) -> Tuple[float, Result]:
+    # Wall clock, as it has to compare across processes
+    waited = time.time() - submitted
+    return waited, func(*args, **kwargs)
+
+
+class Pool:
+    """Named executor that keeps track of its queue depth and wait times."""
+
+    name: str
+    size: int
+
+    calls: int
+    pending: int
+    waited: float
+    max_wait: float
+
+    _executor: Optional[Executor]
+
+    def __init__(self, name: str, size: int) -> None:
+        self.name = name
+        self.size = size
+
+        self.calls = 0
+        self.pending = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+        self._executor = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.name in PROCESS_POOLS:
+                self._executor = ProcessPoolExecutor(self.size)
+            else:
+                self._executor = ThreadPoolExecutor(self.size,
+                                                    thread_name_prefix=self.name)
+
+        return self._executor
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.pending - self.size)
+
+    @property
+    def stats(self) -> MutableMapping[str, Any]:
+        return {
+            "name": self.name,
+            "size": self.size,
+            "pending": self.pending,
+            "queued": self.queued,
+            "calls": self.calls,
+            "average_wait": self.waited / self.calls if self.calls else 0.0,
+            "max_wait": self.max_wait
+        }
+
+    async def run(self, func: Callable[..., Result], *args: Any, **kwargs: Any) -> Result:
+        loop = asyncio.get_event_loop()
+        self.pending += 1
+        try:
+            call = functools.partial(_timed, func, time.time(), *args, **kwargs)
+            waited, result = await loop.run_in_executor(self.executor, call)
+        finally:
+            self.pending -= 1
+
+        self.calls += 1
+        self.waited += waited
+        self.max_wait = max(self.max_wait, waited)
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+pools: Dict[str, Pool] = {}
+
+
+def configure(sizes: MutableMapping[str, int]) -> None:
+    """Overrides the size of pools, takes effect on pools not started yet."""
+
+    SIZES.update(sizes)
+    for name, size in sizes.items():
+        if name in pools and pools[name]._executor is None:  # skipcq: PYL-W0212
+            pools[name].size = size
+
+
+def get_pool(name: str) -> Pool:
+    pool = pools.get(name)
+    if pool is None:
+        pool = pools[name] = Pool(name, SIZES.get(name, 4))
+
+    return pool
+
+
+def shutdown() -> None:
+    for pool in pools.values():
+        pool.shutdown()
+
+
+async def run_sync(func: Callable[..., Result], *args: Any, pool: Optional[str] = None,
+                   **kwargs: Any) -> Result:
+    """Runs the given sync function (optionally with arguments) on a separate thread.
+
+    pool picks the named executor to run it on, the loop's default executor
+    otherwise. Functions given to a process pool ("cpu") must be picklable."""
+
+    if pool is not None:
+        return await get_pool(pool).run(func, *args, **kwargs)
 
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
\ No newline at end of file
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
@@ -0,0 +1,88 @@
+import asyncio
+from typing import (Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set,
+                    Tuple, TypeVar)
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+class Batcher(Generic[_T, _R]):
+    """Coalesces items submitted close together into a single call of send.
+
+    Items are grouped by key, a group is sent once it holds size items or
+    delay seconds after its first item arrived, whichever comes first. send
+    returns one result per item in the same order, an exception instance in
+    place of a result fails only the caller that submitted that item."""
+
+    send: Callable[[List[_T]], Awaitable[List[Any]]]
+    size: int
+    delay: float
+
+    _key: Callable[[_T], Hashable]
+    _pending: Dict[Hashable, List[Tuple[_T, "asyncio.Future[_R]"]]]
+    _tasks: Set[asyncio.Task]
+    _timers: Dict[Hashable, asyncio.TimerHandle]
+
+    def __init__(self, send: Callable[[List[_T]], Awaitable[List[Any]]], *, size: int,
+                 delay: float, key: Optional[Callable[[_T], Hashable]] = None) -> None:
+        self.send = send
+        self.size = size
+        self.delay = delay
+
+        self._key = key if key is not None else lambda _: None
+        self._pending = {}
+        self._tasks = set()
+        self._timers = {}
+
+    async def submit(self, item: _T) -> _R:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[_R]" = loop.create_future()
+
+        key = self._key(item)
+        pending = self._pending.setdefault(key, [])
+        pending.append((item, future))
+        if len(pending) >= self.size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.delay, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        pending = self._pending.pop(key, [])
+        while pending:
+            batch, pending = pending[:self.size], pending[self.size:]
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[_T, "asyncio.Future[_R]"]]) -> None:
+        try:
+            results = await self.send([item for item, _ in batch])
+        except Exception as e:  # skipcq: PYL-W0703
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():  # Caller gave up waiting
+                continue
+
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def flush(self) -> None:
+        """Sends everything pending right away and waits for it."""
+
+        for key in list(self._pending):
+            self._flush(key)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import (Any, Dict, Generic, Hashable, Iterable, MutableMapping, Optional, Set,
+                    Tuple, TypeVar)
+
+_V = TypeVar("_V")
+
+
+class TTLCache(Generic[_V]):
+    """Size bounded cache whose entries expire ttl seconds after being stored.
+
+    The least recently used entry makes room once maxsize is reached. Entries
+    carry tags, invalidating a tag drops every entry stored with it. Values are
+    shared, not copied, so callers must copy one before modifying it."""
+
+    ttl: float
+    maxsize: int
+
+    hits: int
+    misses: int
+
+    _entries: "OrderedDict[Hashable, Tuple[float, _V, Tuple[Hashable, ...]]]"
+    _tags: Dict[Hashable, Set[Hashable]]
+
+    def __init__(self, *, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._tags = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> MutableMapping[str, Any]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def get(self, key: Hashable) -> Optional[_V]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: _V, tags: Iterable[Hashable] = ()) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        tags = tuple(tags)
+        self._entries[key] = (monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tags: Hashable) -> None:
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is None:
+                continue
+
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
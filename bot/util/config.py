@@ -22,9 +22,12 @@ class TelegramConfig(MutableMapping[_KT, _VT]):
             "db_uri": os.environ.get("DB_URI"),
             "download_path": AsyncPath(os.environ.get("DOWNLOAD_PATH",
                                                       Path.home() / "downloads")),
+            "executor_sizes": os.environ.get("EXECUTOR_SIZES"),
             "gdrive_folder_id": os.environ.get("G_DRIVE_FOLDER_ID"),
             "gdrive_index_link": os.environ.get("G_DRIVE_INDEX_LINK"),
             "gdrive_secret": os.environ.get("G_DRIVE_SECRET"),
+            "gdrive_sync": os.environ.get("G_DRIVE_SYNC"),
+            "gdrive_upload_workers": os.environ.get("G_DRIVE_UPLOAD_WORKERS"),
             "owner_id": os.environ.get("OWNER_ID"),
         }
 
@@ -38,10 +41,17 @@ class TelegramConfig(MutableMapping[_KT, _VT]):
             else:
                 if key == "download_path":
                     value = AsyncPath(value)
+                elif key == "executor_sizes":
+                    value = {name.strip(): int(size) for name, size in (
+                        item.split("=") for item in value.split(",") if item.strip())}
                 elif key == "gdrive_index_link":
                     value = value.rstrip("/")
                 elif key == "gdrive_secret":
                     value = json.loads(value)
+                elif key == "gdrive_sync":
+                    value = value.lower() in {"1", "true", "yes"}
+                elif key == "gdrive_upload_workers":
+                    value = int(value)
 
             super().__setattr__(key, value)
             self.__data[key] = value
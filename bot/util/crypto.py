@@ -1,9 +1,15 @@
 import base64
 import codecs
 import json
+import mmap
+import os
 import struct
-from typing import MutableMapping
+from typing import Iterator, List, MutableMapping, Sequence, Tuple
 from Crypto.Cipher import AES
+from Crypto.Util import Counter
+
+# Size of the buffer each worker reuses while decrypting its range
+CTR_BUFFER_SIZE = 4 * 1024 * 1024
 
 
 def makebyte(x: str) -> bytes:
@@ -112,3 +118,89 @@ def base64_url_encode(data):
 
 def a32_to_base64(a):
     return base64_url_encode(a32_to_str(a))
+
+
+def aes_ctr_decrypt_range(source: str, output: str, key: bytes,
+                          initial_value: int, offset: int, length: int) -> int:
+    """Decrypts ``length`` bytes at ``offset`` of an AES-CTR file into ``output``.
+
+    CTR keystream blocks only depend on their position, so ranges aligned to
+    the 16 bytes block size can be decrypted independently of each other.
+    Data is read into one reused buffer and decrypted in place."""
+
+    if offset % AES.block_size:
+        raise ValueError("offset must be aligned to the AES block size")
+
+    counter = Counter.new(128, initial_value=initial_value + offset // AES.block_size)
+    aes = AES.new(key, AES.MODE_CTR, counter=counter)
+
+    buffer = bytearray(min(CTR_BUFFER_SIZE, length))
+    view = memoryview(buffer)
+    src = os.open(source, os.O_RDONLY)
+    try:
+        dst = os.open(output, os.O_WRONLY)
+        try:
+            position, end = offset, offset + length
+            while position < end:
+                size = os.preadv(src, [view[:min(len(buffer), end - position)]],
+                                 position)
+                if size == 0:
+                    break
+
+                chunk = view[:size]
+                aes.decrypt(chunk, output=chunk)
+                os.pwrite(dst, chunk, position)
+                position += size
+        finally:
+            os.close(dst)
+    finally:
+        os.close(src)
+
+    return position - offset
+
+
+def get_chunks(size: int) -> Iterator[Tuple[int, int]]:
+    """Yields Mega's (offset, length) MAC chunk schedule for a file size.
+
+    Chunks start at 128 KiB and grow by 128 KiB up to 1 MiB each."""
+
+    position = 0
+    length = 0x20000
+    while position + length < size:
+        yield position, length
+        position += length
+        if length < 0x100000:
+            length += 0x20000
+
+    yield position, size - position
+
+
+def mega_chunk_macs(path: str, key: bytes, iv: bytes,
+                    chunks: Sequence[Tuple[int, int]]) -> List[bytes]:
+    """Computes the CBC-MAC of each given plaintext chunk of a Mega file."""
+
+    macs = []
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0,
+                                             access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        try:
+            for offset, length in chunks:
+                chunk = view[offset:offset + length]
+                if length % AES.block_size:
+                    chunk = bytes(chunk) + b"\0" * (AES.block_size -
+                                                     length % AES.block_size)
+
+                macs.append(AES.new(key, AES.MODE_CBC, iv).encrypt(chunk)[-16:])
+                del chunk
+        finally:
+            view.release()
+
+    return macs
+
+
+def mega_meta_mac(macs: Sequence[bytes], key: bytes) -> Tuple[int, int]:
+    """Condenses per-chunk MACs into the 64-bit meta-MAC stored in Mega's key."""
+
+    file_mac = AES.new(key, AES.MODE_CBC, makebyte("\0" * 16)).encrypt(b"".join(macs))[-16:]
+    words = str_to_a32(file_mac)
+    return words[0] ^ words[1], words[2] ^ words[3]
@@ -1,4 +1,5 @@
 import asyncio
+import weakref
 from collections import deque
 from contextlib import asynccontextmanager
 from functools import partial
@@ -25,11 +26,14 @@ from bson.codec_options import DEFAULT_CODEC_OPTIONS
 from bson.timestamp import Timestamp
 from bson.son import SON
 from pymongo import (
+    DeleteMany,
     DeleteOne,
     IndexModel,
     InsertOne,
     MongoClient,
-    ReplaceOne
+    ReplaceOne,
+    UpdateMany,
+    UpdateOne
 )
 from pymongo.change_stream import ChangeStream
 from pymongo.client_session import ClientSession, SessionOptions, TransactionOptions
@@ -39,7 +43,13 @@ from pymongo.command_cursor import CommandCursor as _CommandCursor
 from pymongo.cursor import _QUERY_OPTIONS, Cursor as _Cursor, RawBatchCursor
 from pymongo.database import Database
 from pymongo.driver_info import DriverInfo
-from pymongo.errors import InvalidOperation, OperationFailure, PyMongoError
+from pymongo.errors import (
+    BulkWriteError,
+    InvalidOperation,
+    OperationFailure,
+    PyMongoError,
+    WriteError
+)
 from pymongo.monotonic import time as monotonic_time
 from pymongo.read_concern import ReadConcern
 from pymongo.read_preferences import (
@@ -74,10 +84,20 @@ ReadPreferences = TypeVar(
         Nearest
     ]
 )
-Request = TypeVar("Request", bound=Union[DeleteOne, InsertOne, ReplaceOne])
+WriteRequest = Union[DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany,
+                     UpdateOne]
+Request = TypeVar("Request", bound=WriteRequest)
 Results = TypeVar("Results")
 
 
+def run_sync(func: Callable[..., Results], *args: Any,
+             **kwargs: Any) -> Coroutine[Any, Any, Results]:
+    """Runs a blocking pymongo call on the db executor, so it never waits
+    behind long running work on the shared one."""
+
+    return util.run_sync(func, *args, pool="db", **kwargs)
+
+
 class Cursor(_Cursor):
 
     _Cursor__data: Deque[Any]
@@ -96,7 +116,7 @@ class Cursor(_Cursor):
         return self.__data
 
     async def _AsyncCursor__die(self, synchronous: bool = False) -> None:
-        await util.run_sync(self.__die, synchronous=synchronous)
+        await run_sync(self.__die, synchronous=synchronous)
 
     @property
     def _AsyncCursor__exhaust(self) -> bool:
@@ -167,7 +187,7 @@ class CommandCursor(_CommandCursor):
 
 
     async def _AsyncCommandCursor__die(self, synchronous: bool = False) -> None:
-        await util.run_sync(self.__die, synchronous=synchronous)
+        await run_sync(self.__die, synchronous=synchronous)
 
     @property
     def _AsyncCommandCursor__data(self) -> Deque[Any]:
@@ -271,19 +291,19 @@ class AsyncClientSession(AsyncBase):
         return self
 
     async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
-        await util.run_sync(self.dispatch.__exit__, exc_type, exc_val, exc_tb)
+        await run_sync(self.dispatch.__exit__, exc_type, exc_val, exc_tb)
 
     def __enter__(self) -> None:
         raise RuntimeError("Use 'async with' not just 'with'")
 
     async def abort_transaction(self) -> None:
-        return await util.run_sync(self.dispatch.abort_transaction)
+        return await run_sync(self.dispatch.abort_transaction)
 
     async def commit_transaction(self) -> None:
-        return await util.run_sync(self.dispatch.commit_transaction)
+        return await run_sync(self.dispatch.commit_transaction)
 
     async def end_session(self) -> None:
-        return await util.run_sync(self.dispatch.end_session)
+        return await run_sync(self.dispatch.end_session)
 
     @asynccontextmanager
     async def start_transaction(
@@ -294,7 +314,7 @@ class AsyncClientSession(AsyncBase):
         read_preference: Optional[ReadPreferences] = None,
         max_commit_time_ms: Optional[int] = None
     ) -> AsyncGenerator["AsyncClientSession", None]:
-        await util.run_sync(
+        await run_sync(
             self.dispatch.start_transaction,
             read_concern=read_concern,
             write_concern=write_concern,
@@ -429,7 +449,9 @@ class AsyncClient(AsyncBaseProperty):
         return AsyncDB(self, self.dispatch[name])
 
     async def close(self) -> None:
-        await util.run_sync(self.dispatch.close)
+        # Writes still sitting in a bulk writer would be lost otherwise
+        await asyncio.gather(*(writer.flush() for writer in list(_writers)))
+        await run_sync(self.dispatch.close)
 
     async def drop_database(
         self,
@@ -439,7 +461,7 @@ class AsyncClient(AsyncBaseProperty):
         if isinstance(name_or_database, AsyncDB):
             name_or_database = name_or_database.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.drop_database,
             name_or_database,
             session=session.dispatch if session else session
@@ -488,7 +510,7 @@ class AsyncClient(AsyncBaseProperty):
     async def list_database_names(
         self, session: Optional[AsyncClientSession] = None
     ) -> List[str]:
-        return await util.run_sync(self.dispatch.list_database_names,
+        return await run_sync(self.dispatch.list_database_names,
                                    session=session.dispatch if session else session)
 
     async def list_databases(
@@ -500,7 +522,7 @@ class AsyncClient(AsyncBaseProperty):
                                      codec_options=DEFAULT_CODEC_OPTIONS,
                                      read_preference=ReadPreference.PRIMARY,
                                      write_concern=DEFAULT_WRITE_CONCERN)
-        res: MutableMapping[str, Any] = await util.run_sync(
+        res: MutableMapping[str, Any] = await run_sync(
             database.dispatch._retryable_read_command,  # skipcq: PYL-W0212
             cmd,
             session=session.dispatch if session else session
@@ -515,7 +537,7 @@ class AsyncClient(AsyncBaseProperty):
     async def server_info(
         self, session: Optional[AsyncClientSession] = None
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.server_info,
             session=session.dispatch if session else session
         )
@@ -530,7 +552,7 @@ class AsyncClient(AsyncBaseProperty):
         default_transaction_options: Optional[TransactionOptions] = None,
         snapshot: bool = False,
     ) -> AsyncGenerator[AsyncClientSession, None]:
-        session = await util.run_sync(
+        session = await run_sync(
             self.dispatch.start_session,
             causal_consistency=causal_consistency,
             default_transaction_options=default_transaction_options,
@@ -723,7 +745,7 @@ class AsyncDB(AsyncBaseProperty):
         **kwargs: Any
     ) -> "AsyncCollection":
         return AsyncCollection(
-            await util.run_sync(
+            await run_sync(
                 self.dispatch.create_collection,
                 name,
                 codec_options=codec_options,
@@ -738,7 +760,7 @@ class AsyncDB(AsyncBaseProperty):
     async def dereference(
         self, dbref: DBRef, *, session: Optional[AsyncClientSession] = None, **kwargs: Any
     ) -> Optional[MutableMapping[str, Any]]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.dereference,
             dbref,
             session=session.dispatch if session else session,
@@ -753,7 +775,7 @@ class AsyncDB(AsyncBaseProperty):
         if isinstance(name_or_collection, AsyncCollection):
             name_or_collection = name_or_collection.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.drop_collection,
             name_or_collection,
             session=session.dispatch if session else session
@@ -785,7 +807,7 @@ class AsyncDB(AsyncBaseProperty):
         query: Optional[MutableMapping[str, Any]] = None,
         **kwargs: Any
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.list_collection_names,
             session=session.dispatch if session else session,
             filter=query,
@@ -802,7 +824,7 @@ class AsyncDB(AsyncBaseProperty):
         cmd = SON([("listCollections", 1)])
         cmd.update(query, **kwargs)
 
-        res: MutableMapping[str, Any] = await util.run_sync(
+        res: MutableMapping[str, Any] = await run_sync(
             self.dispatch._retryable_read_command,  # skipcq: PYL-W0212
             cmd,
             session=session.dispatch if session else session
@@ -821,7 +843,7 @@ class AsyncDB(AsyncBaseProperty):
         if isinstance(name_or_collection, AsyncCollection):
             name_or_collection = name_or_collection.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.validate_collection,
             name_or_collection,
             scandata=scandata,
@@ -945,7 +967,7 @@ class AsyncCollection(AsyncBaseProperty):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None
     ) -> BulkWriteResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.bulk_write,
             request,
             ordered=ordered,
@@ -960,7 +982,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> int:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.count_documents,
             query,
             session=session.dispatch if session else session,
@@ -970,7 +992,7 @@ class AsyncCollection(AsyncBaseProperty):
     async def create_index(
         self, keys: Union[str, List[Tuple[str, Any]]], **kwargs: Any
     ) -> str:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.create_index,
             keys,
             **kwargs
@@ -983,7 +1005,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.create_indexes,
             indexes,
             session=session.dispatch if session else session,
@@ -998,7 +1020,7 @@ class AsyncCollection(AsyncBaseProperty):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None
     ) -> DeleteResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.delete_many,
             query,
             collation=collation,
@@ -1014,7 +1036,7 @@ class AsyncCollection(AsyncBaseProperty):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None
     ) -> DeleteResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.delete_one,
             query,
             collation=collation,
@@ -1030,7 +1052,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.distinct,
             key,
             filter=query,
@@ -1039,7 +1061,7 @@ class AsyncCollection(AsyncBaseProperty):
         )
 
     async def drop(self, session: Optional[AsyncClientSession] = None) -> None:
-        await util.run_sync(
+        await run_sync(
             self.dispatch.drop,
             session=session.dispatch if session else session
         )
@@ -1051,20 +1073,24 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> None:
-        await util.run_sync(self.dispatch.drop_index,
+        await run_sync(self.dispatch.drop_index,
                             index_or_name,
                             session=session.dispatch if session else session,
                             **kwargs)
 
     async def drop_indexes(self, session: Optional[AsyncClientSession] = None, **kwargs) -> None:
-        await util.run_sync(
+        await run_sync(
             self.dispatch.drop_indexes,
             session=session.dispatch if session else session,
             **kwargs
         )
 
     async def estimated_document_count(self, **kwargs: Any) -> int:
-        return await util.run_sync(self.dispatch.estimated_document_count, **kwargs)
+        return await run_sync(self.dispatch.estimated_document_count, **kwargs)
+
+    def bulk_writer(self, *, ordered: bool = True, delay: float = 0.05,
+                    size: int = 1000) -> "AsyncBulkWriter":
+        return AsyncBulkWriter(self, ordered=ordered, delay=delay, size=size)
 
     def find(self, *args: Any, **kwargs: Any) -> "AsyncCursor":
         return AsyncCursor(Cursor(self, *args, **kwargs), self)
@@ -1075,7 +1101,7 @@ class AsyncCollection(AsyncBaseProperty):
         *args: Any,
         **kwargs: Any
     ) -> Optional[MutableMapping[str, Any]]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.find_one, query, *args, **kwargs
         )
 
@@ -1089,7 +1115,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.find_one_and_delete,
             query,
             projection=projection,
@@ -1112,7 +1138,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.find_one_and_replace,
             query,
             replacement,
@@ -1139,7 +1165,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.find_one_and_update,
             query,
             update,
@@ -1165,7 +1191,7 @@ class AsyncCollection(AsyncBaseProperty):
     async def index_information(
         self, session: Optional[AsyncClientSession] = None
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.index_information,
             session=session.dispatch if session else session
         )
@@ -1179,7 +1205,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.inline_map_reduce,
             mapping,
             reduce,
@@ -1196,7 +1222,7 @@ class AsyncCollection(AsyncBaseProperty):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None
     ) -> InsertManyResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.insert_many,
             documents,
             ordered=ordered,
@@ -1211,7 +1237,7 @@ class AsyncCollection(AsyncBaseProperty):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None
     ) -> InsertOneResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.insert_one,
             document,
             bypass_document_validation=bypass_document_validation,
@@ -1237,7 +1263,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.map_reduce,
             mapping,
             reduce,
@@ -1250,7 +1276,7 @@ class AsyncCollection(AsyncBaseProperty):
     async def options(
         self, session: Optional[AsyncClientSession] = None
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.options,
             session=session.dispatch if session else session
         )
@@ -1262,7 +1288,7 @@ class AsyncCollection(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any
     ) -> MutableMapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.rename,
             new_name,
             session=session.dispatch if session else session,
@@ -1280,7 +1306,7 @@ class AsyncCollection(AsyncBaseProperty):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.replace_one,
             query,
             replacement,
@@ -1303,7 +1329,7 @@ class AsyncCollection(AsyncBaseProperty):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.update_many,
             query,
             update,
@@ -1327,7 +1353,7 @@ class AsyncCollection(AsyncBaseProperty):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.update_one,
             query,
             update,
@@ -1395,6 +1421,93 @@ class AsyncCollection(AsyncBaseProperty):
         return self.dispatch.name
 
 
+class AsyncBulkWriter:
+    """Coalesces writes to a collection into bulk_write calls.
+
+       Writes queued within delay seconds of each other go out as a single
+       :meth:`~AsyncCollection.bulk_write`, each caller gets the result of the
+       bulk its write went in with, or the error of its own write. With
+       ordered the bulks are sent one after another in the order queued.
+       Pending writes are flushed when the client closes.
+    """
+
+    collection: AsyncCollection
+    ordered: bool
+
+    _batcher: "util.batch.Batcher[WriteRequest, BulkWriteResult]"
+    _lock: asyncio.Lock
+
+    def __init__(self, collection: AsyncCollection, *, ordered: bool = True,
+                 delay: float = 0.05, size: int = 1000) -> None:
+        self.collection = collection
+        self.ordered = ordered
+
+        self._batcher = util.batch.Batcher(self._send, size=size, delay=delay)
+        self._lock = asyncio.Lock()
+        _writers.add(self)
+
+    async def _send(self, requests: List[WriteRequest]) -> List[Any]:
+        if self.ordered:
+            async with self._lock:
+                return await self._write(requests)
+
+        return await self._write(requests)
+
+    async def _write(self, requests: List[WriteRequest]) -> List[Any]:
+        try:
+            result = await self.collection.bulk_write(requests, ordered=self.ordered)
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                raise
+
+            results: List[Any] = [BulkWriteResult(e.details, True)] * len(requests)
+            errors = e.details.get("writeErrors", [])
+            for error in errors:
+                results[error["index"]] = WriteError(error.get("errmsg"),
+                                                     error.get("code"), error)
+            if self.ordered and errors:
+                # Everything queued after the first failure never ran
+                first = min(error["index"] for error in errors)
+                results[first + 1:] = [e] * (len(requests) - first - 1)
+
+            return results
+
+        return [result] * len(requests)
+
+    async def write(self, request: WriteRequest) -> BulkWriteResult:
+        return await self._batcher.submit(request)
+
+    async def insert_one(self, document: MutableMapping[str, Any]) -> BulkWriteResult:
+        return await self.write(InsertOne(document))
+
+    async def update_one(self, query: MutableMapping[str, Any],
+                         update: MutableMapping[str, Any], *,
+                         upsert: bool = False) -> BulkWriteResult:
+        return await self.write(UpdateOne(query, update, upsert=upsert))
+
+    async def update_many(self, query: MutableMapping[str, Any],
+                          update: MutableMapping[str, Any], *,
+                          upsert: bool = False) -> BulkWriteResult:
+        return await self.write(UpdateMany(query, update, upsert=upsert))
+
+    async def replace_one(self, query: MutableMapping[str, Any],
+                          replacement: MutableMapping[str, Any], *,
+                          upsert: bool = False) -> BulkWriteResult:
+        return await self.write(ReplaceOne(query, replacement, upsert=upsert))
+
+    async def delete_one(self, query: MutableMapping[str, Any]) -> BulkWriteResult:
+        return await self.write(DeleteOne(query))
+
+    async def delete_many(self, query: MutableMapping[str, Any]) -> BulkWriteResult:
+        return await self.write(DeleteMany(query))
+
+    async def flush(self) -> None:
+        await self._batcher.flush()
+
+
+_writers: "weakref.WeakSet[AsyncBulkWriter]" = weakref.WeakSet()
+
+
 class AsyncCursorBase(AsyncBase):
     """Base class for Cursor AsyncIOMongoDB instances
 
@@ -1465,9 +1578,6 @@ class AsyncCursorBase(AsyncBase):
             # Return early if the task was cancelled.
             if future.done():
                 return
-            collection = self.collection
-            fix_outgoing = collection.database._fix_outgoing  # skipcq: PYL-W0212
-
             if length is None:
                 n = result
             else:
@@ -1475,9 +1585,7 @@ class AsyncCursorBase(AsyncBase):
 
             i = 0
             while i < n:
-                the_list.append(
-                    fix_outgoing(self._data().popleft(), collection)
-                )
+                the_list.append(self._pop())
                 i += 1
 
             reached_length = (length is not None and len(the_list) >= length)
@@ -1499,7 +1607,7 @@ class AsyncCursorBase(AsyncBase):
                 future.set_exception(exc)
 
     async def _refresh(self) -> int:
-        return await util.run_sync(self.dispatch._refresh)  # skipcq: PYL-W0212
+        return await run_sync(self.dispatch._refresh)  # skipcq: PYL-W0212
 
     def batch_size(self, batch_size: int) -> "AsyncCursorBase":
         self.dispatch.batch_size(batch_size)
@@ -1508,11 +1616,19 @@ class AsyncCursorBase(AsyncBase):
     async def close(self) -> None:
         if not self.closed:
             self.closed = True
-            await util.run_sync(self.dispatch.close)
+            await run_sync(self.dispatch.close)
+
+    def _pop(self) -> MutableMapping[str, Any]:
+        collection = self.collection
+        fix_outgoing = collection.database._fix_outgoing  # skipcq: PYL-W0212
+
+        return fix_outgoing(self._data().popleft(), collection)
 
     async def next(self) -> Any:
+        # The rest of the current batch is in memory already, only a getMore
+        # for the next one is worth a trip to the executor.
         if self.alive and (self._buffer_size() or await self._get_more()):
-            return await util.run_sync(next, self.dispatch)
+            return self._pop()
         raise StopAsyncIteration
 
     def to_list(
@@ -1655,7 +1771,7 @@ class AsyncLatentCommandCursor(AsyncCommandCursor):
             self.started = True
             original_future = self.loop.create_future()
             future = self.loop.create_task(
-                util.run_sync(self.start, *self.args, **self.kwargs))
+                run_sync(self.start, *self.args, **self.kwargs))
             future.add_done_callback(
                 partial(self.loop.call_soon_threadsafe,
                         self._on_started,
@@ -1727,10 +1843,10 @@ class AsyncCursor(AsyncCursorBase):
         return self
 
     async def distinct(self, key: str) -> List[Any]:
-        return await util.run_sync(self.dispatch.distinct, key)
+        return await run_sync(self.dispatch.distinct, key)
 
     async def explain(self) -> str:
-        return await util.run_sync(self.dispatch.explain)
+        return await run_sync(self.dispatch.explain)
 
     def hint(self, index: Union[str, List[Tuple[str, Any]]]) -> "AsyncCursor":
         self.dispatch = self.dispatch.hint(index)
@@ -1858,18 +1974,18 @@ class AsyncChangeStream(AsyncBase):
 
     async def _init(self) -> ChangeStream:
         if not self.dispatch:
-            self.dispatch = await util.run_sync(
+            self.dispatch = await run_sync(
                 self._target.dispatch.watch, **self._options)
 
         return self.dispatch
 
     async def _try_next(self) -> Optional[MutableMapping[str, Any]]:
         self.dispatch = await self._init()
-        return await util.run_sync(self.dispatch.try_next)
+        return await run_sync(self.dispatch.try_next)
 
     async def close(self):
         if self.dispatch:
-            await util.run_sync(self.dispatch.close)
+            await run_sync(self.dispatch.close)
 
     async def next(self) -> MutableMapping[str, Any]:
         while self.alive:
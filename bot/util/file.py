@@ -1,4 +1,5 @@
 import asyncio
+import hashlib
 from datetime import datetime, timedelta
 from mimetypes import guess_type
 from os.path import join
@@ -8,7 +9,6 @@ from typing import Any, Optional, Tuple, Union
 from aiopath import AsyncPath
 from pyrogram.types import Message
 
-from .async_helper import run_sync
 from .time import format_duration_td as time, sec
 
 
@@ -26,6 +26,17 @@ def human_readable_bytes(value: Union[float, int],
     return f"{value:.{digits}f}" + delim + chosen_unit + postfix
 
 
+def md5sum(path: str, block: int = 1024 * 1024) -> str:
+    """Hex md5 digest of a file, as Drive reports it in md5Checksum."""
+
+    digest = hashlib.md5()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(block), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
 class File:
 
     _content: Any
@@ -108,7 +119,7 @@ class File:
     async def progress_string(self) -> Tuple[Optional[str], bool, Optional[str]]:
         file = self.content
         progress = None
-        status, response = await run_sync(file.next_chunk, num_retries=5)
+        status, response = await file.next_chunk(num_retries=5)
         if status:
             after = sec() - self.start_time
             size = status.total_size
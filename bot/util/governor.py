@@ -0,0 +1,161 @@
+import asyncio
+import random
+from time import monotonic
+from typing import Any, Awaitable, Callable, ClassVar, Dict, MutableMapping, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+Predicate = Callable[[BaseException], bool]
+
+
+class Lane:
+    """Admission control for one class of calls to a rate limited API.
+
+    A token bucket caps the request rate while an additive increase,
+    multiplicative decrease limit caps how many calls are in flight: every
+    success widens the window by roughly one call per round trip, every
+    rate limit response halves it."""
+
+    # Rate limit responses of calls already in flight belong to the same
+    # congestion event, only the first one within this window shrinks the limit.
+    decrease_interval: ClassVar[float] = 1.0
+    retry_base: ClassVar[float] = 1.0
+    retry_cap: ClassVar[float] = 32.0
+
+    name: str
+    rate: float
+    burst: float
+    limit: float
+    maximum: float
+    active: int
+    tokens: float
+
+    calls: int
+    throttled: int
+
+    _condition: asyncio.Condition
+    _decreased: float
+    _limited: Predicate
+    _transient: Predicate
+    _updated: float
+
+    def __init__(self, name: str, *, rate: float, burst: float, concurrency: int,
+                 maximum: int, limited: Predicate, transient: Predicate) -> None:
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.limit = concurrency
+        self.maximum = maximum
+        self.active = 0
+        self.tokens = burst
+
+        self.calls = 0
+        self.throttled = 0
+
+        self._condition = asyncio.Condition()
+        self._decreased = 0.0
+        self._limited = limited
+        self._transient = transient
+        self._updated = monotonic()
+
+    @property
+    def stats(self) -> MutableMapping[str, Any]:
+        return {
+            "name": self.name,
+            "active": self.active,
+            "limit": int(self.limit),
+            "calls": self.calls,
+            "throttled": self.throttled
+        }
+
+    async def _token(self) -> None:
+        while True:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def acquire(self) -> None:
+        await self._token()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+    async def release(self, error: Optional[BaseException] = None) -> None:
+        self.calls += 1
+        if error is not None and self._limited(error):
+            self.throttled += 1
+            now = monotonic()
+            if now - self._decreased >= self.decrease_interval:
+                self.limit = max(1.0, self.limit / 2)
+                self._decreased = now
+            # Stop admitting anything until the bucket refills
+            self.tokens = min(self.tokens, 0.0)
+        elif error is None:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self) -> "Lane":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.release(exc_val)
+
+    def retryable(self, error: BaseException) -> bool:
+        return self._limited(error) or self._transient(error)
+
+    async def call(self, func: Callable[..., Awaitable[_T]], *args: Any,
+                   retries: int = 5, **kwargs: Any) -> _T:
+        """Runs func under the lane, retrying throttled and transient failures
+        with full jitter exponential backoff."""
+
+        attempt = 0
+        while True:
+            try:
+                async with self:
+                    return await func(*args, **kwargs)
+            except Exception as e:  # skipcq: PYL-W0703
+                if attempt >= retries or not self.retryable(e):
+                    raise
+
+                attempt += 1
+                await self.backoff(attempt)
+
+    async def backoff(self, attempt: int) -> None:
+        """Sleeps a full jitter exponential delay before another attempt."""
+
+        await asyncio.sleep(
+            random.uniform(0, min(self.retry_cap, self.retry_base * 2 ** attempt)))
+
+
+class Governor:
+    """Every call to one API goes through one of its lanes."""
+
+    lanes: Dict[str, Lane]
+
+    _limited: Predicate
+    _transient: Predicate
+
+    def __init__(self, *, limited: Predicate, transient: Predicate) -> None:
+        self.lanes = {}
+
+        self._limited = limited
+        self._transient = transient
+
+    def __getitem__(self, name: str) -> Lane:
+        return self.lanes[name]
+
+    def add(self, name: str, *, rate: float, burst: float, concurrency: int,
+            maximum: int) -> Lane:
+        lane = Lane(name, rate=rate, burst=burst, concurrency=concurrency,
+                    maximum=maximum, limited=self._limited, transient=self._transient)
+        self.lanes[name] = lane
+        return lane
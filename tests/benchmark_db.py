@@ -0,0 +1,68 @@
+"""Times reading 10k documents with plain pymongo and with util.db cursors.
+
+Needs a MongoDB server, point MONGO_URI at it (defaults to localhost) and run
+from the repository root with ``PYTHONPATH=. python tests/benchmark_db.py``.
+The documents go into a throwaway database that is dropped afterwards."""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from pymongo import MongoClient
+
+from bot.util import db
+
+DOCUMENTS = 10_000
+DATABASE = "benchmark_db"
+URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
+
+
+async def best(func: Callable[[], Awaitable[Any]], repeat: int = 5) -> float:
+    fastest = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        fastest = min(fastest, time.perf_counter() - started)
+
+    return fastest
+
+
+async def main() -> None:
+    sync = MongoClient(URI)
+    client = db.AsyncClient(URI)
+    try:
+        sync[DATABASE].docs.insert_many(
+            [{"_id": index, "name": f"Episode {index:05}.mkv", "size": index * 1024}
+             for index in range(DOCUMENTS)])
+        collection = client[DATABASE]["docs"]
+
+        async def plain() -> None:
+            # The floor, blocking the loop for the whole read
+            list(sync[DATABASE].docs.find())
+
+        async def hop() -> None:
+            # What every document cost before, one executor round trip each
+            cursor = collection.find()
+            while await db.run_sync(next, cursor.dispatch, None) is not None:
+                pass
+
+        async def iterate() -> None:
+            async for _ in collection.find():
+                pass
+
+        async def to_list() -> None:
+            await collection.find().to_list()
+
+        for name, func in (("pymongo", plain), ("hop per document", hop),
+                           ("async for", iterate), ("to_list", to_list)):
+            print(f"{name:>16}: {await best(func) * 1000:8.2f} ms "
+                  f"for {DOCUMENTS} documents")
+    finally:
+        sync.drop_database(DATABASE)
+        sync.close()
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
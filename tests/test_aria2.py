@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiorun")
+pytest.importorskip("aioaria2")
+pytest.importorskip("pyrogram")
+
+from bot.plugins.aria2 import Aria2WebSocketServer  # noqa: E402
+from bot.util.aria2 import Download  # noqa: E402
+
+
+class FakeDrive:
+
+    async def uploadFile(self, file, msg=None):
+        return "empty-id"  # What uploadFile returns for a 0-byte file
+
+    async def getInfo(self, identifier, fields):
+        return {"size": "0", "webContentLink": f"https://drive/{identifier}"}
+
+
+class FakeBot:
+
+    def __init__(self):
+        self.replies = []
+
+    async def respond(self, msg, text, mode=None):
+        self.replies.append(text)
+
+
+def test_empty_file_upload_finishes_inline():
+    async def main():
+        bot = FakeBot()
+        server = Aria2WebSocketServer.__new__(Aria2WebSocketServer)
+        server.bot, server.drive = bot, FakeDrive()
+        server.lock, server.wakeup = asyncio.Lock(), asyncio.Event()
+        server.downloads, server.uploads = {}, {}
+        server.index_link = None
+        server.context = SimpleNamespace(msg=None, response=None)
+
+        file = SimpleNamespace(gid="gid", name="empty.txt")
+        server.downloads["gid"] = file
+        await server.startUpload(file)
+
+        # Nothing is left for checkProgress to call next_chunk on
+        assert "gid" not in server.uploads
+        assert "gid" not in server.downloads
+        assert bot.replies and "https://drive/empty-id" in bot.replies[0]
+
+    asyncio.run(main())
+
+
+class FailingUpload:
+
+    def __init__(self):
+        self.discarded = False
+
+    async def next_chunk(self, num_retries=5):
+        raise asyncio.TimeoutError()
+
+    async def discard(self):
+        self.discarded = True
+
+
+class FakeClient:
+
+    def __init__(self, status):
+        self.status = status
+
+    async def multicall(self, methods):
+        return [[dict(self.status)] for _ in methods]
+
+
+def test_failed_upload_is_dropped_and_reported(tmp_path):
+    (tmp_path / "file.bin").write_bytes(b"data")
+    status = {"gid": "gid", "status": "complete", "dir": str(tmp_path),
+              "bittorrent": {"info": {"name": "file.bin"}},
+              "files": [{"index": "1", "path": str(tmp_path / "file.bin"),
+                         "length": "4", "completedLength": "4", "selected": "true"}]}
+
+    async def main():
+        bot = FakeBot()
+        server = Aria2WebSocketServer.__new__(Aria2WebSocketServer)
+        server.bot, server.client = bot, FakeClient(status)
+        server.lock = asyncio.Lock()
+        server.index_link = None
+        server.context = SimpleNamespace(msg=None, response=None)
+        server.mega, server.pipelines = set(), {}
+
+        upload = FailingUpload()
+        server.downloads = {"gid": Download(server.client, dict(status))}
+        server.uploads = {"gid": upload}
+
+        # The upload's TimeoutError must not escape the progress loop
+        assert await server.checkProgress() == ""
+
+        assert upload.discarded
+        assert "gid" not in server.uploads
+        assert "gid" not in server.downloads
+        assert bot.replies and "Upload failed" in bot.replies[0]
+
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("aiorun")
+pytest.importorskip("aioaria2")
+pytest.importorskip("pyrogram")
+
+from bot.util.aria2 import Download  # noqa: E402
+
+
+def status(lengths, completed):
+    return {
+        "gid": "gid", "status": "active", "dir": "/downloads",
+        "files": [{"index": str(index + 1), "path": f"/downloads/pack/{index}.mkv",
+                   "length": str(length), "completedLength": str(done),
+                   "selected": "true"}
+                  for index, (length, done) in enumerate(zip(lengths, completed))]
+    }
+
+
+def test_refresh_keeps_file_objects():
+    download = Download(None, status([10, 20], [0, 0]))
+    files = download.files
+
+    download.merge(status([10, 20], [10, 5]))
+
+    assert download.files is files
+    assert [file.completed_length for file in files] == [10, 5]
+
+
+def test_refresh_picks_up_resolved_lengths():
+    # HTTP and magnet downloads know paths before sizes
+    download = Download(None, status([0, 0], [0, 0]))
+
+    download.merge(status([10, 20], [0, 0]))
+
+    assert [file.length for file in download.files] == [10, 20]
+
+
+def test_verified_follows_the_piece_bitfield():
+    # Files of 6, 0, 5 and 5 bytes over 4-byte pieces
+    download = Download(None, status([6, 0, 5, 5], [0, 0, 0, 0]))
+    download.merge({"pieceLength": "4"})
+    download.watch_pieces = True
+    assert "bitfield" in download.progress_keys
+
+    # Pieces 0 and 1 hold the first file, the third one still needs piece 2
+    download.merge({"bitfield": "c"})
+    assert [download.verified(file) for file in download.files] == [
+        True, True, False, False]
+
+    download.merge({"bitfield": "f"})
+    assert all(download.verified(file) for file in download.files)